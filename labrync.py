@@ -2,45 +2,87 @@
 
 import curses
 import time
+import tracemalloc
 import math
+import os
 import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 from package.render import render_scene
-from package.maze import get_maze, get_fog
+from package.framebuffer import FrameBuffer
+from package.target import CursesTarget, MemoryTarget
+from package.raycast import np as raycast_np
+from package.bench import format_report, percentile
+from package.scheduler import FrameScheduler
+from package.view_cache import ViewCache
+from package.pipeline import LevelPipeline
+from package.endless import EndlessMaze
+from package.palette import Palette
+from package.maze import get_maze, get_fog, get_maze_stats, GENERATORS, DEFAULT_ALGORITHM
+from package.maze_cache import MazeCache
+from package.maze_file import load_maze, save_maze, MazeFileError
+from package.grid import EXIT, DOT
+from package.fov import reveal_fov
 from package.message_box import MessageBox
 from package.language import get_wall_message
-from package.algorithms import get_next_move
+from package.algorithms import Agent, SOLVERS, SOLVER_SETUP, DEFAULT_SOLVER
+from package.swarm import Swarm
 
-def main(stdscr):
+# Autoplay makes one move every this many simulation ticks
+AI_MOVE_TICKS = 10
+
+# Number of upcoming levels generated ahead in the background
+LEVEL_PIPELINE_DEPTH = 2
+
+# Rows kept free under the minimap for the stats
+MINIMAP_STATS_LINES = 5
+
+# How far the player can see, in cells, when lifting the fog of war
+SIGHT_RADIUS = 8
+
+# Walker counts timed by --bench-swarm
+SWARM_BENCH_SIZES = (10, 100, 1000)
+
+def main(stdscr, options):
     # Clear screen and hide cursor
     stdscr.clear()
     curses.curs_set(0)  # Hide cursor
 
+    # Set up colours once; the renderer only reads the precomputed attributes
+    palette = Palette().init_curses()
+
     # Initialize game state
-    game_state = initialize_game_state(get_maze, get_fog, mFogOfWar)
+    game_state = initialize_game_state(get_maze, get_fog, options['fog_of_war'],
+                                       curses.COLS, curses.LINES,
+                                       **get_game_options(options),
+                                       solver=options['solver'] if options['autoplay'] else None)
 
-    # update fog of war around player's position
-    update_fog(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
+    # eat the breadcrumb and lift the fog around player's position
+    visit_cell(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
 
     # Instantiate the message box
-    message_box = MessageBox(stdscr)
+    message_box = MessageBox()
+
+    # Frames are pushed to the terminal through a curses render target
+    target = CursesTarget(stdscr)
+
+    # Off-screen frame that the scene is rendered into and diffed against the screen
+    framebuffer = FrameBuffer(game_state['screen_width'], game_state['screen_height'])
+
+    # Paces simulation ticks and frame deadlines independently
+    scheduler = FrameScheduler(options['fps'], options['tick_rate'])
 
     # Timing variables
     last_time = time.time()
 
+    # What the last drawn frame showed; None forces the first frame to be drawn
+    last_view = None
+
     # Non-blocking input
     stdscr.nodelay(True)
 
     while True:
-        # Calculate elapsed time
-        current_time = time.time()
-        game_state['elapsed_time'] = current_time - last_time
-        last_time = current_time
-
-        # Increment the game ticker
-        game_state['game_ticker'] += 1
-
         # Update the message box
         message_box.update()
 
@@ -50,6 +92,8 @@ def main(stdscr):
             if key != -1:
                 if key == ord('q'):
                     break  # Exit the loop
+                elif key == curses.KEY_RESIZE:
+                    resize_screen(game_state, framebuffer)
                 else:
                     process_key(key, game_state, message_box)
 
@@ -58,12 +102,17 @@ def main(stdscr):
             key = stdscr.getch()
             if key == ord('q'):
                 break  # Exit the loop
+            elif key == curses.KEY_RESIZE:
+                resize_screen(game_state, framebuffer)
+
+        # Run the simulation ticks that are due, independent of the frame rate
+        for _ in range(scheduler.ticks_due()):
+            # Increment the game ticker
+            game_state['game_ticker'] += 1
 
-        # Handle AI moves if AutoPlay is enabled
-        if nAutoPlay:
-            # Define AI move frequency (every 100ms)
-            if game_state['game_ticker'] % 10 == 0:
-                ai_key = get_next_move(
+            # Handle AI moves if AutoPlay is enabled
+            if options['autoplay'] and game_state['game_ticker'] % AI_MOVE_TICKS == 0:
+                ai_key = game_state['agent'].next_move(
                     game_state['mMapData'],
                     game_state['mPlayerX'],
                     game_state['mPlayerY'],
@@ -72,72 +121,589 @@ def main(stdscr):
                 if ai_key:
                     process_key(ai_key, game_state, message_box)
 
-        # Render the scene or message box
-        if message_box.active:
-            message_box.render()
+            # The walkers move at the autoplay pace
+            if game_state['swarm'] is not None and game_state['game_ticker'] % AI_MOVE_TICKS == 0:
+                game_state['swarm'].step()
+
+        if game_state['level_complete'] and not message_box.active:
+            # Level is complete and message box is inactive
+            # Regenerate the map and restart the level
+            game_state['mPlayerLevel'] += 1
+            reset_game(game_state)
+
+        # Only draw when something visible changed (the message box animates every frame)
+        view = get_view_signature(game_state)
+        changed = view != last_view or message_box.active or options['show_fps']
+        if not game_state['level_complete'] or message_box.active:
+            if scheduler.should_render(changed):
+                # Calculate elapsed time between drawn frames
+                current_time = time.time()
+                game_state['elapsed_time'] = current_time - last_time
+                last_time = current_time
+
+                # Render the scene, with the message box drawn over it while one is shown
+                draw_frame(game_state, framebuffer, message_box, palette, options)
+
+                # Push only the cells that changed since the last frame
+                framebuffer.flush(target)
+
+                # Refresh the screen
+                target.present()
+                last_view = view
+
+        # Sleep until the next frame deadline
+        scheduler.wait()
+
+    # Stop generating levels in the background
+    if game_state['level_pipeline'] is not None:
+        game_state['level_pipeline'].close()
+
+def get_view_signature(game_state):
+    """
+    Returns a value that changes whenever the rendered scene would change.
+
+    Parameters:
+        game_state (dict): The current game state.
+
+    Returns:
+        tuple: Player position, heading, level, map generation, screen size and the
+            number of times the walkers have moved.
+    """
+    swarm = game_state['swarm']
+    return (
+        game_state['mPlayerX'],
+        game_state['mPlayerY'],
+        game_state['mPlayerA'],
+        game_state['mPlayerLevel'],
+        game_state['map_generation'],
+        game_state['screen_width'],
+        game_state['screen_height'],
+        swarm.ticks if swarm is not None else 0,
+    )
+
+def draw_frame(game_state, framebuffer, message_box, palette, options, timings=None):
+    """
+    Renders the scene into the framebuffer, with the message box over it if active.
+
+    Parameters:
+        game_state (dict): The current game state.
+        framebuffer (FrameBuffer): The framebuffer to render into.
+        message_box (MessageBox): The message box instance.
+        palette (Palette): Precomputed colour attributes.
+        options (dict): Parsed command-line options.
+        timings (dict): Optional per-phase time accumulator.
+    """
+    render_scene(
+        game_state['render_width'],
+        game_state['render_height'],
+        game_state['screen_width'],
+        game_state['screen_height'],
+        game_state['map_width'],
+        game_state['map_height'],
+        game_state['mPlayerX'],
+        game_state['mPlayerY'],
+        game_state['mPlayerA'],
+        game_state['mFOV'],
+        game_state['mDepth'],
+        game_state['elapsed_time'],
+        game_state['mMapData'],
+        game_state['mPlayerLevel'],
+        options['show_fps'],
+        framebuffer,
+        mEngine=options['engine'],
+        mViewCache=game_state['view_cache'] if options['view_cache'] else None,
+        mMapGeneration=game_state['map_generation'],
+        mPalette=palette,
+        mTimings=timings,
+        mMinimapWidth=game_state['minimap_width'],
+        mMinimapHeight=game_state['minimap_height'],
+        mSwarm=game_state['swarm'],
+        mSprites=options['sprites']
+    )
+    message_box.render(framebuffer)
+
+def run_bench(options):
+    """
+    Runs autoplay headlessly, with no sleep and no terminal, and prints timings.
+
+    Every frame makes one AI move and renders the result into an in-memory target, so
+    the numbers measure the game and renderer alone.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    width = options['bench_width']
+    height = options['bench_height']
+    game_state = initialize_game_state(get_maze, get_fog, options['fog_of_war'], width, height,
+                                       **get_game_options(options), solver=options['solver'])
+    visit_cell(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
+
+    message_box = MessageBox()
+    framebuffer = FrameBuffer(width, height)
+    target = MemoryTarget(width, height)
+    palette = Palette()
+
+    timings = {'ai': 0.0, 'raycast': 0.0, 'shading': 0.0, 'minimap': 0.0, 'output': 0.0}
+    if game_state['swarm'] is not None:
+        timings['swarm'] = 0.0
+    frame_times = []
+    levels = 0
+    swap_times = []
+    plan_stats = {'plans': 0, 'expansions': 0, 'plan_time': 0.0}
+
+    while True:
+        if options['bench_levels'] is not None and not options['endless']:
+            if levels >= options['bench_levels']:
+                break
+        elif len(frame_times) >= options['bench_frames']:
+            break
+
+        frame_start = time.perf_counter()
+        game_state['elapsed_time'] = frame_times[-1] if frame_times else 0.0
+        game_state['game_ticker'] += 1
+        message_box.update()
+
+        ai_key = game_state['agent'].next_move(
+            game_state['mMapData'],
+            game_state['mPlayerX'],
+            game_state['mPlayerY'],
+            game_state['mPlayerA']
+        )
+        if ai_key:
+            process_key(ai_key, game_state, message_box)
+        phase_start = time.perf_counter()
+        ai_time = phase_start - frame_start
+
+        if game_state['swarm'] is not None:
+            game_state['swarm'].step()
+            swarm_end = time.perf_counter()
+            swarm_time = swarm_end - phase_start
+            phase_start = swarm_end
+
+        if game_state['level_complete']:
+            # Skip the level complete message and go straight to the next level; the
+            # frame is not drawn or counted, so neither is the time spent on its moves
+            message_box.hide()
+            levels += 1
+            game_state['mPlayerLevel'] += 1
+            add_plan_stats(plan_stats, game_state['agent'])
+            swap_start = time.perf_counter()
+            reset_game(game_state)
+            swap_times.append(time.perf_counter() - swap_start)
+            continue
+
+        timings['ai'] += ai_time
+        if game_state['swarm'] is not None:
+            timings['swarm'] += swarm_time
+        draw_frame(game_state, framebuffer, message_box, palette, options, timings)
+
+        phase_start = time.perf_counter()
+        framebuffer.flush(target)
+        target.present()
+        frame_end = time.perf_counter()
+        timings['output'] += frame_end - phase_start
+        frame_times.append(frame_end - frame_start)
+
+    engine = options['engine'] or ('numpy' if raycast_np is not None else 'python')
+    view_cache = game_state['view_cache']
+    lookups = view_cache.hits + view_cache.misses
+    pipeline = game_state['level_pipeline']
+    if pipeline is not None:
+        pipeline.close()
+        notes = [f"levels     : {levels} completed, swap max {max(swap_times, default=0.0) * 1000:.3f} ms, "
+                 f"{pipeline.stalls} waited for generation"]
+    else:
+        endless_maze = game_state['endless_maze']
+        notes = [f"endless    : {endless_maze.rows_carved} rows of rooms generated, "
+                 f"{endless_maze.scrolled} grid rows scrolled, window {endless_maze.width}x{endless_maze.height}"]
+    if game_state['agent'].planner is not None:
+        add_plan_stats(plan_stats, game_state['agent'])
+        plans = max(1, plan_stats['plans'])
+        notes.append(f"planner    : {plan_stats['plans']} plans, "
+                     f"{plan_stats['expansions'] / plans:.0f} expansions and "
+                     f"{plan_stats['plan_time'] / plans * 1000:.2f} ms per plan")
+    swarm = game_state['swarm']
+    if swarm is not None:
+        notes.append(f"swarm      : {swarm.count} walkers, {swarm.moves} steps, "
+                     f"{swarm.blocked} held back by others, {swarm.respawns} reached a goal")
+    notes.append(f"writes     : {target.writes / max(1, target.frames):.1f} per frame")
+    if options['view_cache']:
+        notes.append(f"view cache : {view_cache.hits / lookups * 100 if lookups else 0.0:.1f}% hits")
+    title = "labrync bench: {} frames at {}x{}, maze {}x{} {} seed {}, {} solver, engine {}, view cache {}".format(
+        len(frame_times), width, height, game_state['map_width'], game_state['map_height'],
+        'endless' if options['endless'] else
+        options['maze_file'] or options['algorithm'] or DEFAULT_ALGORITHM,
+        options['seed'], options['solver'], engine,
+        'on' if options['view_cache'] else 'off')
+    print("\n".join(format_report(title, frame_times, timings, notes)))
+
+def add_plan_stats(plan_stats, agent):
+    """
+    Adds an agent's path planner statistics to the running totals, if it has a planner.
+
+    Parameters:
+        plan_stats (dict): Totals of plans, expansions and plan_time.
+        agent (Agent): The agent, about to be replaced or finished with.
+    """
+    if agent.planner is not None:
+        for key in plan_stats:
+            plan_stats[key] += getattr(agent.planner, key)
+
+def simulate_level(mMapData, solver=DEFAULT_SOLVER, sight_radius=SIGHT_RADIUS, max_keys=None):
+    """
+    Plays one maze to its exit with an autoplay agent, headlessly.
+
+    The keypresses go through the same game logic as in the game (process_key,
+    move_player, the fog of war and level completion), with nothing drawn and no
+    waiting between moves.
+
+    Parameters:
+        mMapData (Grid): The maze, with its fog of war applied.
+        solver (str): Autoplay solver to play with.
+        sight_radius (int): How far the player sees through the fog of war, in cells.
+        max_keys (int): Give up after this many keypresses (default 16 per maze cell).
+
+    Returns:
+        dict: 'solved' (the exit was reached), 'steps' (moves made), 'bumps' (moves a
+            wall was in the way of), 'turns', and 'seconds' taken.
+    """
+    start = time.perf_counter()
+    game_state = new_game_state(mMapData, 0, 0, sight_radius=sight_radius, solver=solver)
+    agent = game_state['agent']
+    message_box = MessageBox()
+    visit_cell(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
+
+    if max_keys is None:
+        max_keys = 16 * mMapData.width * mMapData.height
+    steps = bumps = turns = 0
+    for _ in range(max_keys):
+        if game_state['level_complete']:
+            break
+        key = agent.next_move(game_state['mMapData'], game_state['mPlayerX'],
+                              game_state['mPlayerY'], game_state['mPlayerA'])
+        if key is None:
+            break
+        moved = process_key(key, game_state, message_box)
+        if moved is None:
+            turns += 1
+        elif moved:
+            steps += 1
         else:
-            if not game_state['level_complete']:
-                # Render the scene only if the level is not complete
-                render_scene(
-                    game_state['render_width'],
-                    game_state['render_height'],
-                    game_state['screen_width'],
-                    game_state['screen_height'],
-                    game_state['map_width'],
-                    game_state['map_height'],
-                    game_state['mPlayerX'],
-                    game_state['mPlayerY'],
-                    game_state['mPlayerA'],
-                    game_state['mFOV'],
-                    game_state['mDepth'],
-                    game_state['elapsed_time'],
-                    game_state['mMapData'],
-                    game_state['mPlayerLevel'],
-                    mShowFPS,         # Pass mShowFPS before mFogData
-                    game_state['mFogData'],  # Now correctly passed after mShowFPS
-                    stdscr
-                )
-            else:
-                # Level is complete and message box is inactive
-                # Regenerate the map and restart the level
-                game_state['mPlayerLevel'] += 1
-                reset_game(game_state, get_maze, get_fog, mFogOfWar)
+            bumps += 1
+
+    return {'solved': game_state['level_complete'], 'steps': steps, 'bumps': bumps,
+            'turns': turns, 'seconds': time.perf_counter() - start}
+
+def simulate_maze(task):
+    """
+    Generates one seeded maze and plays it with simulate_level; run by worker processes.
+
+    Parameters:
+        task (tuple): (algorithm, width, height, cell_size, seed, solver, fog_of_war,
+            sight_radius).
+
+    Returns:
+        dict: The results of simulate_level, plus the 'algorithm' and 'seed', the
+            'generate_seconds' taken to generate the maze and the 'cpu_seconds' used.
+    """
+    algorithm, width, height, cell_size, seed, solver, fog_of_war, sight_radius = task
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    grid = get_fog(fog_of_war, get_maze(width, height, cell_size, seed, algorithm))
+    generate_seconds = time.perf_counter() - start
+    result = simulate_level(grid, solver, sight_radius)
+    result.update(algorithm=algorithm, seed=seed, generate_seconds=generate_seconds,
+                  cpu_seconds=time.process_time() - cpu_start)
+    return result
 
-        # Refresh the screen
-        stdscr.refresh()
+def run_simulation(options):
+    """
+    Plays many seeded mazes headlessly across worker processes and prints statistics.
+
+    Each generator (or only the chosen one) gets the same run of seeds. Mazes are
+    independent, so they are spread over a process pool in chunks and the run scales
+    with the number of cores.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    first_seed = options['seed'] if options['seed'] is not None else 0
+    seeds = range(first_seed, first_seed + options['bench_mazes'])
+    algorithms = [options['algorithm']] if options['algorithm'] else list(GENERATORS)
+    workers = options['workers'] or os.cpu_count() or 1
+    tasks = [(algorithm, options['maze_width'], options['maze_height'], options['cell_size'], seed,
+              options['solver'], options['fog_of_war'], options['sight'])
+             for algorithm in algorithms for seed in seeds]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [simulate_maze(task) for task in tasks]
+    else:
+        # Several chunks per worker keep them all busy to the end without a round trip
+        # per maze
+        chunk_size = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_maze, tasks, chunksize=chunk_size))
+    elapsed = time.perf_counter() - start
+
+    def mean(runs, key):
+        return sum(result[key] for result in runs) / len(runs)
+
+    print(f"labrync simulation: {len(seeds)} mazes of {options['maze_width']}x{options['maze_height']} "
+          f"per generator, cell size {options['cell_size']}, {options['solver']} solver, "
+          f"seeds from {first_seed}, {workers} workers")
+    for algorithm in algorithms:
+        runs = [result for result in results if result['algorithm'] == algorithm]
+        steps = sorted(result['steps'] for result in runs if result['solved'])
+        print(f"  {algorithm:<9}: solved {len(steps)}/{len(runs)}  "
+              f"steps mean {sum(steps) / max(1, len(steps)):.0f} "
+              f"p50 {percentile(steps, 50):.0f} max {steps[-1] if steps else 0}  "
+              f"turns {mean(runs, 'turns'):.0f}  bumps {mean(runs, 'bumps'):.1f}  "
+              f"ms/maze: generate {mean(runs, 'generate_seconds') * 1000:.1f} play {mean(runs, 'seconds') * 1000:.1f}")
+    cpu_seconds = sum(result['cpu_seconds'] for result in results)
+    print(f"  total    : {elapsed:.2f} s, {len(results) / elapsed:.1f} mazes/s, "
+          f"{cpu_seconds / elapsed:.1f} CPUs busy on average")
+
+def run_generation_bench(options):
+    """
+    Times every maze generator (or only the chosen one) and prints a comparison.
 
-        # Control frame rate (10 FPS)
-        time.sleep(0.1)
+    Each algorithm generates the same number of mazes from the same seeds. Peak memory
+    is measured on one extra maze with tracemalloc, which is too slow to leave on while
+    timing. Dead ends and junctions are given per 100 open cells as a rough measure of
+    how interesting the mazes are; they are counted on a maze with cell size 1, since
+    wider passages have no single-cell dead ends.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    width = options['maze_width']
+    height = options['maze_height']
+    cell_size = options['cell_size']
+    first_seed = options['seed'] if options['seed'] is not None else 0
+    algorithms = [options['algorithm']] if options['algorithm'] else list(GENERATORS)
+
+    print(f"labrync generation bench: {options['bench_mazes']} mazes of {width}x{height}, "
+          f"cell size {cell_size}, seeds from {first_seed}")
+    for algorithm in algorithms:
+        times = []
+        for seed in range(first_seed, first_seed + options['bench_mazes']):
+            start = time.perf_counter()
+            grid = get_maze(width, height, cell_size, seed, algorithm)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        get_maze(width, height, cell_size, first_seed, algorithm)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        stats = get_maze_stats(grid if cell_size == 1 else
+                               get_maze(width, height, 1, first_seed, algorithm))
+        per_100 = 100.0 / max(1, stats['open_cells'])
+        print(f"  {algorithm:<9}: {sum(times) / len(times) * 1000:9.1f} ms/maze "
+              f"(min {min(times) * 1000:.1f})  peak {peak / 1e6:7.1f} MB  "
+              f"dead ends {stats['dead_ends'] * per_100:4.1f}  "
+              f"junctions {stats['junctions'] * per_100:4.1f}")
+
+def run_swarm_bench(options):
+    """
+    Times swarm ticks at several walker counts on one maze and prints ticks per second.
+
+    Every count roams the same seeded maze, with the --solver solver. The spatial index
+    is timed on the same walkers with one query around a random cell per tick, reaching
+    as far as the 3D view does, like the sprite renderer's.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    seed = options['seed'] if options['seed'] is not None else 0
+    algorithm = options['algorithm'] or DEFAULT_ALGORITHM
+    solver = options['solver']
+    grid = get_maze(options['maze_width'], options['maze_height'], options['cell_size'], seed,
+                    algorithm)
+    if solver in SOLVER_SETUP:
+        SOLVER_SETUP[solver](grid)
+    ticks = options['bench_ticks']
+    counts = [options['walkers']] if options['walkers'] else SWARM_BENCH_SIZES
+
+    print(f"labrync swarm bench: {ticks} ticks on a {grid.width}x{grid.height} {algorithm} "
+          f"maze, seed {seed}, {solver} solver")
+    rng = random.Random(seed)
+    for count in counts:
+        swarm = Swarm(grid, count, solver, seed)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            swarm.step()
+        elapsed = time.perf_counter() - start
+
+        query_start = time.perf_counter()
+        found = 0
+        for _ in range(ticks):
+            found += len(swarm.index.items_near(rng.randrange(grid.width),
+                                                rng.randrange(grid.height), 16))
+        query_time = time.perf_counter() - query_start
+
+        print(f"  {count:>6} walkers: {ticks / elapsed:8.1f} ticks/s  "
+              f"{elapsed / (ticks * count) * 1e6:5.1f} us/walker  "
+              f"held back {swarm.blocked / max(1, swarm.moves + swarm.blocked) * 100:4.1f}%  "
+              f"goals {swarm.respawns}  "
+              f"query {query_time / ticks * 1e6:6.1f} us ({found / ticks:.1f} found)")
+
+def save_maze_file(options):
+    """
+    Generates one maze with the chosen size, algorithm and seed, and saves it to a file.
+
+    Without --seed a random seed is drawn, so the file still records how to regenerate
+    the maze.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    seed = options['seed'] if options['seed'] is not None else random.getrandbits(64)
+    algorithm = options['algorithm'] or DEFAULT_ALGORITHM
+    grid = get_maze(options['maze_width'], options['maze_height'], options['cell_size'], seed,
+                    algorithm)
+    save_maze(options['save_maze'], grid, seed, options['packed'])
+    print(f"Saved {grid.width}x{grid.height} {algorithm} maze (seed {seed}) to {options['save_maze']}")
 
 def parse_arguments(argv):
     """
-    Parses command-line arguments and returns flags.
+    Parses command-line arguments and returns the options.
 
     Parameters:
         argv (list): List of command-line arguments.
 
     Returns:
-        tuple: (nAutoPlay, mShowFPS, mFogOfWar)
-    """
-    nAutoPlay = False
-    mShowFPS = False
-    mFogOfWar = True
-
-    if len(argv) > 1:
-        for arg in argv[1:]:
-            if arg == '-a':
-                nAutoPlay = True
-            elif arg == '-f':
-                mShowFPS = True
-            elif arg == '-w':
-                mFogOfWar = False
-            elif arg == '-h':
-                print_help()
-                # flush buffers and exit
-                sys.stdout.flush()
-                sys.exit(0)
-
-    return nAutoPlay, mShowFPS, mFogOfWar
+        dict: Option values keyed by name.
+    """
+    options = {
+        'autoplay': False,
+        'show_fps': False,
+        'fog_of_war': True,
+        'engine': None,
+        'view_cache': False,
+        'fps': 10,
+        'tick_rate': 10,
+        'bench': False,
+        'bench_frames': 1000,
+        'bench_levels': None,
+        'bench_width': 200,
+        'bench_height': 60,
+        'maze_width': 16,
+        'maze_height': 18,
+        'cell_size': 2,
+        'seed': None,
+        'maze_cache': True,
+        'algorithm': None,
+        'bench_gen': False,
+        'bench_mazes': 3,
+        'endless': False,
+        'maze_file': None,
+        'save_maze': None,
+        'packed': False,
+        'sight': SIGHT_RADIUS,
+        'solver': DEFAULT_SOLVER,
+        'simulate': False,
+        'workers': None,
+        'walkers': 0,
+        'sprites': False,
+        'bench_swarm': False,
+        'bench_ticks': 200,
+    }
+
+    # Options that take a value, mapped to their option name
+    int_options = {
+        '--fps': 'fps',
+        '--tick-rate': 'tick_rate',
+        '--frames': 'bench_frames',
+        '--levels': 'bench_levels',
+        '--width': 'bench_width',
+        '--height': 'bench_height',
+        '--maze-width': 'maze_width',
+        '--maze-height': 'maze_height',
+        '--cell-size': 'cell_size',
+        '--mazes': 'bench_mazes',
+        '--sight': 'sight',
+        '--workers': 'workers',
+        '--walkers': 'walkers',
+        '--ticks': 'bench_ticks',
+    }
+
+    args = argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '-a':
+            options['autoplay'] = True
+        elif arg == '-f':
+            options['show_fps'] = True
+        elif arg == '-w':
+            options['fog_of_war'] = False
+        elif arg == '--bench':
+            options['bench'] = True
+        elif arg == '--bench-gen':
+            options['bench_gen'] = True
+        elif arg == '--simulate':
+            options['simulate'] = True
+        elif arg == '--bench-swarm':
+            options['bench_swarm'] = True
+        elif arg == '--sprites':
+            options['sprites'] = True
+        elif arg == '--endless':
+            options['endless'] = True
+        elif arg == '--packed':
+            options['packed'] = True
+        elif arg in ('--maze-file', '--save-maze') and i + 1 < len(args):
+            i += 1
+            options[arg[2:].replace('-', '_')] = args[i]
+        elif arg == '--view-cache':
+            options['view_cache'] = True
+        elif arg == '--no-maze-cache':
+            options['maze_cache'] = False
+        elif arg == '--algorithm' and i + 1 < len(args) and args[i + 1] in GENERATORS:
+            i += 1
+            options['algorithm'] = args[i]
+        elif arg == '--solver' and i + 1 < len(args) and args[i + 1] in SOLVERS:
+            i += 1
+            options['solver'] = args[i]
+        elif arg == '--seed' and i + 1 < len(args) and args[i + 1].isdigit():
+            i += 1
+            options['seed'] = int(args[i])
+        elif (arg == '--engine' and i + 1 < len(args) and
+              (args[i + 1] == 'python' or args[i + 1] == 'numpy' and raycast_np is not None)):
+            # The numpy engine is only valid when NumPy is installed
+            i += 1
+            options['engine'] = args[i]
+        elif arg in int_options and i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+            i += 1
+            options[int_options[arg]] = int(args[i])
+        elif arg in ('--engine', '--seed', '--algorithm', '--solver', '--maze-file', '--save-maze') or arg in int_options:
+            print(f"Missing or invalid value for {arg}")
+            print_help()
+            sys.exit(2)
+        elif arg == '-h':
+            print_help()
+            # flush buffers and exit
+            sys.stdout.flush()
+            sys.exit(0)
+        i += 1
+
+    if options['maze_width'] < 3 or options['maze_height'] < 3:
+        print("The maze must be at least 3x3")
+        print_help()
+        sys.exit(2)
+
+    if options['maze_file'] is not None:
+        if options['endless']:
+            print("--maze-file cannot be combined with --endless")
+            sys.exit(2)
+        try:
+            load_maze(options['maze_file'])
+        except (OSError, MazeFileError) as error:
+            print(f"Cannot load maze: {error}")
+            sys.exit(2)
+
+    return options
 
 def print_help():
     """
@@ -147,97 +713,252 @@ def print_help():
         "Usage: python labrync.py [options]\n"
         "Options:\n"
         "  -a : Auto-play the game\n"
+        "  --solver NAME : Autoplay solver: distance, astar, jps or graph (shortest path) or wall\n"
+        "                  (follow the left wall) (default distance)\n"
         "  -f : Show FPS\n"
         "  -w : Disable fog of war\n"
-        "  -h : Display this help message"
+        f"  --sight N : How far the player sees through the fog of war, in cells (default {SIGHT_RADIUS})\n"
+        "  --walkers N : Let N autoplay walkers roam the maze too, using --solver\n"
+        "    --sprites : Also draw the walkers in the 3D view\n"
+        "  -h : Display this help message\n"
+        "  --fps N : Target frames per second (default 10)\n"
+        "  --tick-rate N : Simulation ticks per second; autoplay moves every 10 ticks (default 10)\n"
+        "  --engine numpy|python : Ray casting engine (default: numpy when installed)\n"
+        "  --maze-width N, --maze-height N : Maze size in cells (default 16x18)\n"
+        "  --cell-size N : Passage width of the generated maze (default 2)\n"
+        "  --algorithm NAME : Maze generator: division, kruskal, wilson or eller (default division)\n"
+        "  --seed N : Generate the same sequence of mazes on every run\n"
+        "  --endless : Play one endless maze that is generated as the player goes down;\n"
+        "              --maze-height sets how many rows are kept in memory\n"
+        "  --no-maze-cache : Do not save or reload large seeded mazes on disk\n"
+        "  --maze-file PATH : Play the maze saved in PATH on every level\n"
+        "  --save-maze PATH : Generate one maze with the options above, save it to PATH and exit\n"
+        "    --packed : Save two cells per byte; smaller, but loaded by copying\n"
+        "  --view-cache : Reuse the rendered view when back on a cell and heading seen lately\n"
+        "  --bench : Run autoplay headlessly with no sleep and print timings\n"
+        "    --frames N : Number of frames to run (default 1000)\n"
+        "    --levels N : Stop after N completed levels instead\n"
+        "    --width N, --height N : Screen size to render (default 200x60)\n"
+        "  --bench-gen : Time each maze generator at the --maze-width/--maze-height size\n"
+        "    --mazes N : Mazes per generator (default 3)\n"
+        "  --simulate : Autoplay --mazes seeded mazes per generator headlessly and print statistics\n"
+        "    --workers N : Worker processes (default: one per CPU)\n"
+        "  --bench-swarm : Time walker ticks at 10, 100 and 1000 walkers (or --walkers N)\n"
+        "    --ticks N : Ticks per walker count (default 200)\n"
         "   q : Quit the game (while playing)"
     )
     print(help_message)
     sys.stdout.flush()
 
-def initialize_game_state(get_maze_func, get_fog_func, mFogOfWar):
+def get_maze_cache(options):
+    """
+    Returns the on-disk maze cache to use, or None when it is disabled.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    return MazeCache() if options['maze_cache'] else None
+
+def get_game_options(options):
+    """
+    Returns the keyword arguments of initialize_game_state that come straight from the
+    command line; the caller adds the player's solver.
+
+    Parameters:
+        options (dict): Parsed command-line options.
+    """
+    return {
+        'maze_width': options['maze_width'],
+        'maze_height': options['maze_height'],
+        'cell_size': options['cell_size'],
+        'seed': options['seed'],
+        'maze_cache': get_maze_cache(options),
+        'algorithm': options['algorithm'] or DEFAULT_ALGORITHM,
+        'endless': options['endless'],
+        'maze_file': options['maze_file'],
+        'sight_radius': options['sight'],
+        'walkers': options['walkers'],
+        'walker_solver': options['solver'],
+    }
+
+def initialize_game_state(get_maze_func, get_fog_func, mFogOfWar, screen_width, screen_height, *,
+                          maze_width=16, maze_height=18, cell_size=2, seed=None, maze_cache=None,
+                          algorithm=DEFAULT_ALGORITHM, endless=False, maze_file=None,
+                          sight_radius=SIGHT_RADIUS, solver=None, walkers=0,
+                          walker_solver=DEFAULT_SOLVER):
     """
     Initializes and returns the game state dictionary.
 
     Parameters:
         get_maze_func (function): Function to get the maze.
         get_fog_func (function): Function to get the fog of war.
+        mFogOfWar (bool): Whether the map starts hidden.
+        screen_width (int): Screen width in characters.
+        screen_height (int): Screen height in characters.
+        maze_width (int): Maze width in cells.
+        maze_height (int): Maze height in cells.
+        cell_size (int): Passage width of the generated maze.
+        seed (int): Seed for the sequence of levels, or None for different mazes every run.
+        maze_cache (MazeCache): Cache for large seeded mazes, or None to always generate.
+        algorithm (str): Name of the maze generator.
+        endless (bool): Stream one endless maze instead of playing separate levels.
+        maze_file (str): Maze file to play on every level instead of generating mazes.
+        sight_radius (int): How far the player sees through the fog of war, in cells.
+        solver (str): Autoplay solver, or None when the game is not autoplayed.
+        walkers (int): Number of autoplay walkers roaming the maze besides the player.
+        walker_solver (str): Autoplay solver of the walkers.
 
     Returns:
         dict: Game state variables.
     """
-    mMapData = get_maze_func()
-    mFogData = get_fog_func(mFogOfWar)
-    mMapWidth = len(mMapData[0])
-    mMapHeight = len(mMapData)
+    # Each level gets its own seed, drawn in order from the run's seed
+    level_seeds = random.Random(seed) if seed is not None else None
 
-    # Convert map data to list of lists if necessary
-    if isinstance(mMapData[0], str):
-        mMapData = [list(row) for row in mMapData]
+    solvers = {solver, walker_solver} if walkers else {solver}
+    solver_setups = [SOLVER_SETUP[name] for name in solvers if name in SOLVER_SETUP]
 
-    # Ensure mFogData matches mMapData dimensions
-    if not isinstance(mFogData, list):
-        raise ValueError("mFogData must be a list of lists.")
-    if len(mFogData) != mMapHeight:
-        raise ValueError("mFogData height does not match mMapData.")
-    for row in mFogData:
-        if not isinstance(row, list) or len(row) != mMapWidth:
-            raise ValueError("Each row in mFogData must be a list with length equal to mMapWidth.")
+    # The maze, fog of war and breadcrumbs share one grid of cell flags
+    def make_level():
+        level_seed = level_seeds.getrandbits(64) if level_seeds is not None else None
+        if maze_file is not None:
+            # Mapped copy-on-write, so each level starts from the file's own maze
+            grid = load_maze(maze_file)
+        elif maze_cache is not None:
+            grid = maze_cache.get_maze(get_maze_func, algorithm, maze_width, maze_height,
+                                       cell_size, level_seed)
+        else:
+            grid = get_maze_func(maze_width, maze_height, cell_size, level_seed, algorithm)
+        for solver_setup in solver_setups:
+            solver_setup(grid)
+        return get_fog_func(mFogOfWar, grid)
 
-    return {
-        'screen_width': curses.COLS,
-        'screen_height': curses.LINES,
-        'map_width': mMapWidth,
-        'map_height': mMapHeight,
-        'render_width': curses.COLS - mMapWidth - 5,
-        'render_height': curses.LINES,
+    if endless:
+        # A fixed-size window onto one endless maze; there are no further levels
+        endless_maze = EndlessMaze(maze_width, maze_height, cell_size, seed, not mFogOfWar)
+        mMapData = endless_maze.grid
+        level_pipeline = None
+    else:
+        # The first level is built here; the following ones in the background while playing
+        endless_maze = None
+        mMapData = make_level()
+        level_pipeline = LevelPipeline(make_level, LEVEL_PIPELINE_DEPTH)
+
+    return new_game_state(mMapData, screen_width, screen_height, level_pipeline, endless_maze,
+                          sight_radius, solver, walkers, walker_solver, seed)
+
+def new_game_state(mMapData, screen_width, screen_height, level_pipeline=None, endless_maze=None,
+                   sight_radius=SIGHT_RADIUS, solver=None, walkers=0, walker_solver=DEFAULT_SOLVER,
+                   seed=None):
+    """
+    Returns the game state dictionary for a player starting out in mMapData.
+
+    Parameters:
+        mMapData (Grid): The maze, with its fog of war applied.
+        screen_width (int): Screen width in characters.
+        screen_height (int): Screen height in characters.
+        level_pipeline (LevelPipeline): Source of the following levels, or None.
+        endless_maze (EndlessMaze): The endless maze mMapData is a window of, or None.
+        sight_radius (int): How far the player sees through the fog of war, in cells.
+        solver (str): Autoplay solver, or None when the game is not autoplayed.
+        walkers (int): Number of autoplay walkers roaming the maze besides the player.
+        walker_solver (str): Autoplay solver of the walkers.
+        seed (int): Seed for where the walkers start, or None.
+
+    Returns:
+        dict: Game state variables.
+    """
+    game_state = {
+        'screen_width': screen_width,
+        'screen_height': screen_height,
+        'map_width': mMapData.width,
+        'map_height': mMapData.height,
         'mPlayerX': 1.5,
         'mPlayerY': 1.5,
         'mPlayerA': 0.0,
         'mFOV': math.pi / 4.0,
         'mDepth': 16.0,
         'mMapData': mMapData,
-        'mFogData': mFogData,
         'mPlayerLevel': 0,
+        'map_generation': 0,
+        'view_cache': ViewCache(),
+        'level_pipeline': level_pipeline,
+        'endless_maze': endless_maze,
+        'sight_radius': sight_radius,
+        'agent': Agent(solver) if solver is not None else None,
+        'swarm': Swarm(mMapData, walkers, walker_solver, seed) if walkers else None,
         'game_ticker': 0,
         'elapsed_time': 0.0,
         'level_complete': False
     }
+    update_layout(game_state)
+    return game_state
 
-def reset_game(game_state, get_maze_func, get_fog_func, mFogOfWar):
+def reset_game(game_state):
     """
     Resets the game state for a new level.
 
+    The next maze has already been generated in the background by the level pipeline,
+    so this only swaps it in.
+
     Parameters:
         game_state (dict): The current game state.
-        get_maze_func (function): Function to get the maze.
-        get_fog_func (function): Function to get the fog of war.
     """
     game_state['mPlayerX'] = 1.5
     game_state['mPlayerY'] = 1.5
     game_state['mPlayerA'] = 0.0
-    game_state['mMapData'] = get_maze_func()
-    game_state['mFogData'] = get_fog_func(mFogOfWar)
-    game_state['map_width'] = len(game_state['mMapData'][0])
-    game_state['map_height'] = len(game_state['mMapData'])
+    game_state['mMapData'] = game_state['level_pipeline'].next_level()
+    if game_state['agent'] is not None:
+        game_state['agent'] = Agent(game_state['agent'].solver)
+    if game_state['swarm'] is not None:
+        game_state['swarm'].reset(game_state['mMapData'])
+    game_state['map_width'] = game_state['mMapData'].width
+    game_state['map_height'] = game_state['mMapData'].height
+    update_layout(game_state)
     game_state['game_ticker'] = 0
     game_state['level_complete'] = False
 
-    # Convert map data to list of lists if necessary
-    if isinstance(game_state['mMapData'][0], str):
-        game_state['mMapData'] = [list(row) for row in game_state['mMapData']]
-
-    # Ensure mFogData matches mMapData dimensions
-    if not isinstance(game_state['mFogData'], list):
-        raise ValueError("mFogData must be a list of lists.")
-    if len(game_state['mFogData']) != game_state['map_height']:
-        raise ValueError("mFogData height does not match mMapData.")
-    for row in game_state['mFogData']:
-        if not isinstance(row, list) or len(row) != game_state['map_width']:
-            raise ValueError("Each row in mFogData must be a list with length equal to map_width.")
-        
-    # update fog of war around player's position
-    update_fog(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
+    # Cached 3D views of the old maze can no longer match; rather than freeing them all
+    # at once here, they age out of the LRU as views of the new maze are added
+    game_state['map_generation'] += 1
+
+    # eat the breadcrumb and lift the fog around player's position
+    visit_cell(game_state, int(game_state['mPlayerX']), int(game_state['mPlayerY']))
+
+def resize_screen(game_state, framebuffer):
+    """
+    Adapts the game state and framebuffer to a resized terminal.
+
+    Parameters:
+        game_state (dict): The current game state.
+        framebuffer (FrameBuffer): The framebuffer the scene is rendered into.
+    """
+    curses.update_lines_cols()
+    game_state['screen_width'] = curses.COLS
+    game_state['screen_height'] = curses.LINES
+    update_layout(game_state)
+    framebuffer.resize(curses.COLS, curses.LINES)
+
+    # Cached views were rendered for the old size
+    game_state['view_cache'].clear()
+
+def update_layout(game_state):
+    """
+    Splits the screen between the 3D view and the minimap.
+
+    Mazes larger than the minimap area are shown through a window that follows the
+    player, so the 3D view keeps most of the screen whatever the maze size.
+
+    Parameters:
+        game_state (dict): The current game state.
+    """
+    screen_width = game_state['screen_width']
+    screen_height = game_state['screen_height']
+    minimap_width = min(game_state['map_width'], max(16, screen_width // 3))
+    minimap_height = min(game_state['map_height'], max(1, screen_height - MINIMAP_STATS_LINES))
+    game_state['minimap_width'] = minimap_width
+    game_state['minimap_height'] = minimap_height
+    game_state['render_width'] = screen_width - minimap_width - 5
+    game_state['render_height'] = screen_height
 
 def rotate_left(game_state):
     """
@@ -267,6 +988,10 @@ def move_player(game_state, direction, message_box):
         game_state (dict): The current game state.
         direction (str): 'forward' or 'backward'.
         message_box (MessageBox): The message box instance.
+
+    Returns:
+        bool: True if the player moved, False if they bumped into a wall; None for an
+            invalid direction.
     """
     if direction == 'forward':
         delta_x = math.sin(game_state['mPlayerA'])
@@ -283,37 +1008,66 @@ def move_player(game_state, direction, message_box):
     nTestY = int(game_state['mPlayerY'] + nMoveY)
 
     if 0 <= nTestX < game_state['map_width'] and 0 <= nTestY < game_state['map_height']:
-        if game_state['mMapData'][nTestY][nTestX] != '#':
+        if not game_state['mMapData'].is_wall(nTestX, nTestY):
             game_state['mPlayerX'] += nMoveX
             game_state['mPlayerY'] += nMoveY
 
-            update_fog(game_state, nTestX, nTestY)
+            visit_cell(game_state, nTestX, nTestY)
 
-            if game_state['mMapData'][nTestY][nTestX] == 'X':
+            if game_state['mMapData'].has(nTestX, nTestY, EXIT):
                 message_box.show("Level Complete!", 2.0)
                 game_state['level_complete'] = True
-        else:
-            # Show appropriate message based on movement direction
-            if direction == 'forward':
-                message_box.show(get_wall_message(), 1.0)
-            elif direction == 'backward':
-                message_box.show("Ouch!", 1.0)
+
+            if game_state['endless_maze'] is not None:
+                scroll_endless_maze(game_state)
+            return True
+
+        # Show appropriate message based on movement direction
+        if direction == 'forward':
+            message_box.show(get_wall_message(), 1.0)
+        elif direction == 'backward':
+            message_box.show("Ouch!", 1.0)
+    return False
+
+def scroll_endless_maze(game_state):
+    """
+    Streams more of the endless maze in once the player heads far enough down.
+
+    Parameters:
+        game_state (dict): The current game state.
+    """
+    shift = game_state['endless_maze'].scroll(int(game_state['mPlayerY']))
+    if shift:
+        game_state['mMapData'] = game_state['endless_maze'].grid
+        game_state['mPlayerY'] -= shift
+        if game_state['swarm'] is not None:
+            game_state['swarm'].scroll(game_state['mMapData'], shift)
+
+        # Cached views were rendered from the old window
+        game_state['map_generation'] += 1
+
+def visit_cell(game_state, x, y):
+    """
+    Eats the breadcrumb under the player and lifts the fog of war around them.
+
+    Parameters:
+        game_state (dict): The current game state.
+        x (int): Player's X position.
+        y (int): Player's Y position.
+    """
+    game_state['mMapData'].clear_flag(x, y, DOT)
+    update_fog(game_state, x, y)
 
 def update_fog(game_state, x, y):
     """
-    Updates the fog of war around the player's current position.
+    Lifts the fog of war on everything the player can see from their position.
 
     Parameters:
         game_state (dict): The current game state.
         x (int): Player's X position.
         y (int): Player's Y position.
     """
-    for i in range(-2, 3):
-        for j in range(-2, 3):
-            nx = x + i
-            ny = y + j
-            if 0 <= nx < game_state['map_width'] and 0 <= ny < game_state['map_height']:
-                game_state['mFogData'][ny][nx] = True
+    reveal_fov(game_state['mMapData'], x, y, game_state['sight_radius'])
 
 def process_key(key, game_state, message_box):
     """
@@ -323,17 +1077,32 @@ def process_key(key, game_state, message_box):
         key (int): The key code.
         game_state (dict): The current game state.
         message_box (MessageBox): The message box instance.
+
+    Returns:
+        bool: For moves, whether the player moved (see move_player); None for other keys.
     """
     if key in [ord('a'), curses.KEY_LEFT]:
         rotate_left(game_state)
     elif key in [ord('d'), curses.KEY_RIGHT]:
         rotate_right(game_state)
     elif key in [ord('w'), curses.KEY_UP]:
-        move_player(game_state, 'forward', message_box)
+        return move_player(game_state, 'forward', message_box)
     elif key in [ord('s'), curses.KEY_DOWN]:
-        move_player(game_state, 'backward', message_box)
+        return move_player(game_state, 'backward', message_box)
+    return None
 
 if __name__ == "__main__":
     # Parse command-line arguments before initializing curses
-    nAutoPlay, mShowFPS, mFogOfWar = parse_arguments(sys.argv)
-    curses.wrapper(main)
+    options = parse_arguments(sys.argv)
+    if options['save_maze'] is not None:
+        save_maze_file(options)
+    elif options['simulate']:
+        run_simulation(options)
+    elif options['bench_gen']:
+        run_generation_bench(options)
+    elif options['bench_swarm']:
+        run_swarm_bench(options)
+    elif options['bench']:
+        run_bench(options)
+    else:
+        curses.wrapper(main, options)
@@ -1,203 +1,225 @@
 # algorithms.py
 
 import math
+import weakref
+from collections import deque
 
-def get_next_move(mMapData, mPlayerX, mPlayerY, mPlayerA):
+from package.grid import EXIT, WALL
+from package.distance_field import DistanceField
+from package.junction_graph import JunctionGraph
+from package.wall_index import get_wall_index
+from package.planner import PathPlanner, find_path_astar, find_path_jps, STEPS
+
+# Map directions in clockwise order, in the same order as the planner's STEPS
+DIRECTIONS = ['up', 'right', 'down', 'left']
+
+# Keypresses the AI sends
+TURN_LEFT = ord('a')
+TURN_RIGHT = ord('d')
+MOVE_FORWARD = ord('w')
+
+# Turns that face the player (target - facing) % 4 places clockwise; a U-turn is two
+# right turns
+TURNS = ((), (TURN_RIGHT,), (TURN_RIGHT, TURN_RIGHT), (TURN_LEFT,))
+
+# Directions the wall follower tries, relative to the way the player faces: left,
+# ahead, right, then back out of a dead end
+WALL_FOLLOWING_ORDER = (3, 0, 1, 2)
+
+# Distance fields of the mazes in play, built once per maze and dropped along with it
+_distance_fields = weakref.WeakKeyDictionary()
+# Junction graphs of the mazes in play, kept the same way
+_junction_graphs = weakref.WeakKeyDictionary()
+
+def get_facing(angle):
     """
-    Determines the next move for the player using the Left-Hand Wall Following Rule with line of sight for exit.
-    
+    Returns the index in DIRECTIONS of the map direction closest to angle.
+
+    Angle 0 faces South (+Y, 'down' on the map) and angles grow towards East (+X).
+    """
+    angle = angle % (2 * math.pi)
+    if (7 * math.pi / 4 <= angle < 2 * math.pi) or (0 <= angle < math.pi / 4):
+        return 2
+    elif math.pi / 4 <= angle < 3 * math.pi / 4:
+        return 1
+    elif 3 * math.pi / 4 <= angle < 5 * math.pi / 4:
+        return 0
+    elif 5 * math.pi / 4 <= angle < 7 * math.pi / 4:
+        return 3
+    return 2  # Default to 'down' if uncertain
+
+def get_goal_cells(mMapData):
+    """
+    Returns the cells autoplay heads for: the exits, or in a maze without one (the
+    endless maze) every open cell of the lowest open row.
+    """
+    exits = mMapData.find_flag(EXIT)
+    if exits:
+        return exits
+    for y in range(mMapData.height - 1, -1, -1):
+        row = mMapData.row(y)
+        goals = [(x, y) for x in range(mMapData.width) if not row[x] & WALL]
+        if goals:
+            return goals
+    return []
+
+def get_distance_field(mMapData):
+    """
+    Returns the distance field towards the goal cells of mMapData, building it on first
+    use. Calling this as a level is generated keeps the search off the main loop.
+
     Parameters:
-        mMapData (list of list of str): The maze representation.
-        mPlayerX (float): Player's current X position.
-        mPlayerY (float): Player's current Y position.
-        mPlayerA (float): Player's current angle (radians).
-    
+        mMapData (Grid): The maze representation.
+
     Returns:
-        int or None: The next keypress to execute (ord('w'), ord('a'), ord('d'), ord('s')) or None if no move is possible.
+        DistanceField: Walking distances to the nearest goal cell.
     """
-    # Initialize AI state within function attributes
-    if not hasattr(get_next_move, 'command_queue'):
-        get_next_move.command_queue = []
-        get_next_move.previous_pos = (int(mPlayerX), int(mPlayerY))
-    
-    # If there are pending commands, execute them first
-    if get_next_move.command_queue:
-        return get_next_move.command_queue.pop(0)
-    
-    # Directions in order: up, right, down, left
-    directions = ['up', 'right', 'down', 'left']
-    
-    # Helper function to determine the current direction based on angle
-    def get_current_direction(angle):
-        angle = angle % (2 * math.pi)
-        if (7 * math.pi / 4 <= angle < 2 * math.pi) or (0 <= angle < math.pi / 4):
-            return 'up'
-        elif math.pi / 4 <= angle < 3 * math.pi / 4:
-            return 'right'
-        elif 3 * math.pi / 4 <= angle < 5 * math.pi / 4:
-            return 'down'
-        elif 5 * math.pi / 4 <= angle < 7 * math.pi / 4:
-            return 'left'
-        return 'up'  # Default to 'up' if uncertain
-    
-    # Helper function to get the direction index
-    def get_direction_index(direction):
-        return directions.index(direction)
-    
-    # Helper functions to turn left, right, and move forward/backward
-    def turn_left():
-        return ord('a')
-    
-    def turn_right():
-        return ord('d')
-    
-    def move_forward():
-        return ord('w')
-    
-    def move_backward():
-        return ord('s')
-    
-    # Helper function to get cell coordinates based on direction
-    def get_cell(x, y, direction):
-        if direction == 'up':
-            return (int(x), int(y) - 1)
-        elif direction == 'right':
-            return (int(x) + 1, int(y))
-        elif direction == 'down':
-            return (int(x), int(y) + 1)
-        elif direction == 'left':
-            return (int(x) - 1, int(y))
-        return (int(x), int(y))
-    
-    # Helper function to check if a cell is free
-    def is_free(x, y):
-        if 0 <= y < len(mMapData) and 0 <= x < len(mMapData[0]):
-            return mMapData[y][x] != '#'
-        return False
-    
-    # Helper function to check line of sight between two points (only horizontal or vertical)
-    def is_visible(start, end, mMapData):
-        x0, y0 = start
-        x1, y1 = end
-        
-        if x0 == x1:
-            # Vertical line
-            step = 1 if y1 > y0 else -1
-            for y in range(y0 + step, y1, step):
-                if mMapData[y][x0] == '#':
-                    return False
-            return True
-        elif y0 == y1:
-            # Horizontal line
-            step = 1 if x1 > x0 else -1
-            for x in range(x0 + step, x1, step):
-                if mMapData[y0][x] == '#':
-                    return False
-            return True
-        return False  # Not in direct line of sight
-    
-    # Helper function to find all exit positions
-    def find_exits(mMapData):
-        exits = []
-        for y, row in enumerate(mMapData):
-            for x, cell in enumerate(row):
-                if cell == 'X':
-                    exits.append((x, y))
-        return exits
-    
-    # Helper function to enqueue commands safely
-    def enqueue_commands(commands):
-        for cmd in commands:
-            get_next_move.command_queue.append(cmd)
-    
-    # Get current position
-    current_pos = (int(mPlayerX), int(mPlayerY))
-    
-    # Reset command queue if player has moved
-    if current_pos != get_next_move.previous_pos:
-        get_next_move.command_queue = []
-        get_next_move.previous_pos = current_pos
-    
-    # Find all exits
-    exits = find_exits(mMapData)
-    
-    # Check for exits in direct horizontal or vertical line of sight
-    for exit_pos in exits:
-        if (current_pos[0] == exit_pos[0] or current_pos[1] == exit_pos[1]) and is_visible(current_pos, exit_pos, mMapData):
-            # Determine direction to exit
-            if exit_pos[0] == current_pos[0]:
-                if exit_pos[1] < current_pos[1]:
-                    target_dir = 'up'
-                else:
-                    target_dir = 'down'
+    field = _distance_fields.get(mMapData)
+    if field is None:
+        field = DistanceField(mMapData, get_goal_cells(mMapData))
+        _distance_fields[mMapData] = field
+    return field
+
+def get_junction_graph(mMapData):
+    """
+    Returns the junction graph of mMapData with its goal cells as nodes, building it on
+    first use. Like get_distance_field, this is meant to run as a level is generated.
+
+    Parameters:
+        mMapData (Grid): The maze representation.
+
+    Returns:
+        JunctionGraph: The maze's junctions, dead ends and goals and the corridors
+            between them.
+    """
+    graph = _junction_graphs.get(mMapData)
+    if graph is None:
+        graph = JunctionGraph(mMapData, get_goal_cells(mMapData))
+        _junction_graphs[mMapData] = graph
+    return graph
+
+def find_path_graph(mMapData, start, goals):
+    """
+    Finds a shortest path from start to the nearest goal with A* over the maze's
+    junction graph; a planner search like find_path_astar.
+    """
+    graph = get_junction_graph(mMapData)
+    if graph.goals != goals:
+        graph = JunctionGraph(mMapData, goals)
+        _junction_graphs[mMapData] = graph
+    return graph.find_path(start)
+
+def is_free(mMapData, x, y):
+    return mMapData.in_bounds(x, y) and not mMapData.is_wall(x, y)
+
+
+class Agent:
+    """
+    Autoplay for one player, choosing each next keypress with one of the SOLVERS.
+
+    All of an agent's state lives on the agent: queued commands and, for the planning
+    solvers, its own path planner. Agents are made per level, and any number can play
+    in one process. Data that only depends on the maze, like distance fields and wall
+    indexes, is cached with the maze and shared by all agents; a changed maze (a new
+    level, or the endless maze scrolling) is a new Grid, so nothing goes stale.
+    """
+
+    __slots__ = ('solver', 'solve', 'commands', 'planner')
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.solve = SOLVERS[solver]
+        self.commands = deque()  # Keypresses still to send for the current step
+        search = PLANNER_SEARCHES.get(solver)
+        self.planner = PathPlanner(search, get_goal_cells) if search is not None else None
+
+    def next_move(self, mMapData, mPlayerX, mPlayerY, mPlayerA):
+        """
+        Determines the player's next move.
+
+        Parameters:
+            mMapData (Grid): The maze representation.
+            mPlayerX (float): Player's current X position.
+            mPlayerY (float): Player's current Y position.
+            mPlayerA (float): Player's current angle (radians).
+
+        Returns:
+            int or None: The next keypress to execute (ord('w'), ord('a') or ord('d')),
+                or None if no move is possible.
+        """
+        return self.solve(self, mMapData, int(mPlayerX), int(mPlayerY), get_facing(mPlayerA))
+
+    def distance_move(self, mMapData, x, y, facing):
+        # Step to a neighbour one closer on the maze's distance field, turning to face it
+        # first; where no exit can be reached, follow the wall instead
+        steps = get_distance_field(mMapData).next_steps(x, y)
+        if not steps:
+            return self.wall_move(mMapData, x, y, facing)
+
+        dx, dy = STEPS[facing]
+        if (x + dx, y + dy) in steps:
+            return MOVE_FORWARD
+        target_x, target_y = steps[0]
+        target = STEPS.index((target_x - x, target_y - y))
+        return TURNS[(target - facing) % 4][0]
+
+    def planned_move(self, mMapData, x, y, facing):
+        # Replay the planner's plan to the exit; where none can be reached, follow the wall
+        key = self.planner.next_move(mMapData, x, y, facing)
+        if key is None:
+            return self.wall_move(mMapData, x, y, facing)
+        return key
+
+    def wall_move(self, mMapData, x, y, facing):
+        # Left-hand wall following, heading straight for an exit once it is in sight
+        commands = self.commands
+        if commands:
+            return commands.popleft()
+
+        exit_cell = get_wall_index(mMapData).exit_in_sight(x, y)
+        if exit_cell is not None:
+            exit_x, exit_y = exit_cell
+            if exit_x == x:
+                target = 0 if exit_y < y else 2
             else:
-                if exit_pos[0] < current_pos[0]:
-                    target_dir = 'left'
-                else:
-                    target_dir = 'right'
-            
-            # Determine current direction
-            current_dir = get_current_direction(mPlayerA)
-            current_idx = get_direction_index(current_dir)
-            target_idx = get_direction_index(target_dir)
-            diff = (target_idx - current_idx) % 4
-            
-            # Determine required rotations
-            if diff == 1:
-                enqueue_commands([turn_right()])
-            elif diff == 2:
-                enqueue_commands([turn_right(), turn_right()])
-            elif diff == 3:
-                enqueue_commands([turn_left()])
-            # diff ==0: no rotation needed
-            
-            # Enqueue move forward
-            enqueue_commands([move_forward()])
-            
-            if get_next_move.command_queue:
-                return get_next_move.command_queue.pop(0)
-    
-    # If no direct exit in line of sight, follow left-hand rule
-    # Determine current direction
-    current_dir = get_current_direction(mPlayerA)
-    current_idx = get_direction_index(current_dir)
-    
-    # Determine left, front, and right directions relative to current direction
-    left_idx = (current_idx - 1) % 4
-    front_idx = current_idx
-    right_idx = (current_idx + 1) % 4
-    
-    left_dir = directions[left_idx]
-    front_dir = directions[front_idx]
-    right_dir = directions[right_idx]
-    
-    # Check left cell
-    left_cell = get_cell(mPlayerX, mPlayerY, left_dir)
-    if is_free(*left_cell):
-        # Turn left and move forward
-        enqueue_commands([turn_left(), move_forward()])
-        return get_next_move.command_queue.pop(0)
-    
-    # Check front cell
-    front_cell = get_cell(mPlayerX, mPlayerY, front_dir)
-    if is_free(*front_cell):
-        # Move forward
-        enqueue_commands([move_forward()])
-        return get_next_move.command_queue.pop(0)
-    
-    # Check right cell
-    right_cell = get_cell(mPlayerX, mPlayerY, right_dir)
-    if is_free(*right_cell):
-        # Turn right and move forward
-        enqueue_commands([turn_right(), move_forward()])
-        return get_next_move.command_queue.pop(0)
-    
-    # If all directions blocked, backtrack by moving backward
-    back_dir = directions[(current_idx + 2) % 4]
-    back_cell = get_cell(mPlayerX, mPlayerY, back_dir)
-    if is_free(*back_cell):
-        enqueue_commands([move_backward()])
-        return get_next_move.command_queue.pop(0)
-    
-    # If unable to move, do nothing
-    return None
+                target = 3 if exit_x < x else 1
+            commands.extend(TURNS[(target - facing) % 4])
+            commands.append(MOVE_FORWARD)
+            return commands.popleft()
+
+        for turn in WALL_FOLLOWING_ORDER:
+            dx, dy = STEPS[(facing + turn) % 4]
+            if is_free(mMapData, x + dx, y + dy):
+                commands.extend(TURNS[turn])
+                commands.append(MOVE_FORWARD)
+                return commands.popleft()
+
+        # If unable to move, do nothing
+        return None
+
+
+# Autoplay solvers by name; each is an Agent method called as
+# solve(agent, mMapData, x, y, facing) that returns the next keypress
+SOLVERS = {
+    'distance': Agent.distance_move,
+    'astar': Agent.planned_move,
+    'jps': Agent.planned_move,
+    'graph': Agent.planned_move,
+    'wall': Agent.wall_move,
+}
+
+DEFAULT_SOLVER = 'distance'
+
+# Path search behind each planning solver
+PLANNER_SEARCHES = {
+    'astar': find_path_astar,
+    'jps': find_path_jps,
+    'graph': find_path_graph,
+}
+
+# Per-maze precomputation for a solver, run on each level as it is generated
+SOLVER_SETUP = {
+    'distance': get_distance_field,
+    'graph': get_junction_graph,
+    'wall': get_wall_index,
+}
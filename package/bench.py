@@ -0,0 +1,49 @@
+# bench.py
+
+import math
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+
+    Parameters:
+        sorted_values (list of float): Values in ascending order.
+        pct (float): Percentile in [0, 100].
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    # The smallest value with at least pct percent of the values at or below it
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(1, min(len(sorted_values), rank)) - 1]
+
+
+def format_report(title, frame_times, timings, notes=()):
+    """
+    Formats frame timing results as printable lines.
+
+    Parameters:
+        title (str): First line of the report.
+        frame_times (list of float): Wall-clock seconds per frame.
+        timings (dict): Accumulated seconds per phase name.
+        notes (iterable of str): Extra lines appended to the report.
+
+    Returns:
+        list of str: The report lines.
+    """
+    frames = len(frame_times)
+    total = sum(frame_times)
+    ordered = sorted(frame_times)
+    lines = [title]
+    lines.append(f"  frames/sec : {frames / total if total else 0.0:.1f}")
+    lines.append("  frame time : p50 {:.3f} ms  p95 {:.3f} ms  p99 {:.3f} ms".format(
+        percentile(ordered, 50) * 1000, percentile(ordered, 95) * 1000,
+        percentile(ordered, 99) * 1000))
+    if frames:
+        phases = "  ".join(f"{name} {seconds / frames * 1000:.3f}" for name, seconds in timings.items())
+        lines.append(f"  ms/frame   : {phases}")
+    lines.extend(f"  {note}" for note in notes)
+    return lines
@@ -0,0 +1,83 @@
+# distance_field.py
+
+from array import array
+
+from package.grid import OPEN_MASK
+
+# Distance of a cell that no target can be reached from (walls included)
+UNREACHABLE = -1
+
+
+class DistanceField:
+    """
+    Walking distance from every cell of a maze to the nearest target cell.
+
+    Built once per maze with a breadth-first search outwards from the targets, after
+    which the way to the nearest target from anywhere is a constant-time lookup: step
+    to any neighbour one closer. Distances are kept in a flat array indexed like
+    Grid.cells.
+    """
+
+    def __init__(self, grid, targets):
+        # Only the size is kept: a reference to the grid would keep it alive in the
+        # per-grid caches that hold distance fields
+        self.width = width = grid.width
+        self.height = grid.height
+        size = width * grid.height
+        self.distances = distances = array('i', [UNREACHABLE]) * size
+
+        # Cells still open to the search; each is cleared as soon as it is reached
+        passable = bytearray(grid.translated(OPEN_MASK))
+        frontier = []
+        for x, y in targets:
+            index = y * width + x
+            if distances[index] == UNREACHABLE:
+                distances[index] = 0
+                passable[index] = 0
+                frontier.append(index)
+
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            append = next_frontier.append
+            for index in frontier:
+                x = index % width
+                if x > 0 and passable[index - 1]:
+                    passable[index - 1] = 0
+                    distances[index - 1] = distance
+                    append(index - 1)
+                if x < width - 1 and passable[index + 1]:
+                    passable[index + 1] = 0
+                    distances[index + 1] = distance
+                    append(index + 1)
+                if index >= width and passable[index - width]:
+                    passable[index - width] = 0
+                    distances[index - width] = distance
+                    append(index - width)
+                if index + width < size and passable[index + width]:
+                    passable[index + width] = 0
+                    distances[index + width] = distance
+                    append(index + width)
+            frontier = next_frontier
+
+    def distance(self, x, y):
+        """
+        Returns the number of steps from (x, y) to the nearest target, or UNREACHABLE.
+        """
+        return self.distances[y * self.width + x]
+
+    def next_steps(self, x, y):
+        """
+        Returns the neighbours of (x, y) that are one step closer to a target.
+
+        Returns:
+            list: (x, y) positions, empty at a target or where no target is reachable.
+        """
+        distance = self.distance(x, y)
+        if distance <= 0:
+            return []
+        width = self.width
+        height = self.height
+        return [(nx, ny) for nx, ny in ((x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y))
+                if 0 <= nx < width and 0 <= ny < height and self.distance(nx, ny) == distance - 1]
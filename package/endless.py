@@ -0,0 +1,138 @@
+# endless.py
+
+import random
+from collections import deque
+
+from package.grid import Grid, WALL, DOT, SEEN
+from package.maze import get_lattice, carve_lattice_row, eller_rows
+
+
+class EndlessMaze:
+    """
+    One endless maze, streamed downwards a row of rooms at a time.
+
+    Only a fixed-height window of the maze is resident, as an ordinary Grid, so the
+    renderer, minimap and AI address it like any other maze. Rows of rooms come from
+    Eller's algorithm, which keeps one row of state however long it runs. As the player
+    heads down, rows scroll off the top and new ones are generated at the bottom, so
+    memory stays constant.
+    """
+
+    def __init__(self, width, height, cell_size=2, seed=None, revealed=False):
+        self.cell_size, self.cols, _ = get_lattice(width, height, cell_size)
+        self.step = self.cell_size + 1
+        self.width = width
+        self.height = max(height, 4 * self.step)  # Always a few rows of rooms deep
+        self.fill = WALL | SEEN if revealed else WALL
+        self.labels = list(range(self.cols))  # Generator regions of the next row of rooms
+        self.rows = eller_rows(self.cols, None, random.Random(seed), self.labels)
+        self.scrolled = 0     # Grid rows dropped off the top so far
+        self.rows_carved = 0  # Rows of rooms generated so far
+        self.links = deque()  # (right_row, down_row) passages of each row of rooms in the window
+
+        # Fog of war state is kept in the grid; without fog new rows arrive revealed
+        self._reveal = bytes((value | (self.fill & SEEN)) & 0xFF for value in range(256))
+
+        self.grid = Grid(self.width, self.height, self.fill)
+        self.next_y = 1  # Grid row where the next row of rooms is carved
+        self._carve()
+
+    def _carve(self):
+        # Carve rows of rooms until the next one would not fit in the window
+        cells = self.grid.cells
+        while self.next_y + self.step <= self.height:
+            right_row, down_row = next(self.rows)
+            carve_lattice_row(self.grid, self.cell_size, self.next_y, right_row, down_row)
+            self.links.append((right_row, down_row))
+            start = self.next_y * self.width
+            end = start + self.step * self.width
+            cells[start:end] = cells[start:end].translate(self._reveal)
+            self.next_y += self.step
+            self.rows_carved += 1
+
+    def scroll(self, player_y):
+        """
+        Scrolls the window down once the player is in its lower half.
+
+        Whole rows of rooms are dropped so the player ends up a third of the way down.
+        The scrolled window is a new Grid, so anything cached per grid is rebuilt.
+        Rooms that were only linked through the dropped rows are joined by passages
+        along the new top row, so every part of the window stays reachable.
+
+        Parameters:
+            player_y (int): Player's row in the current window.
+
+        Returns:
+            int: Number of grid rows scrolled; subtract it from the player's Y.
+        """
+        if player_y < self.height // 2:
+            return 0
+        shift = max(1, (player_y - self.height // 3) // self.step) * self.step
+        width = self.width
+
+        grid = Grid(width, self.height, self.fill)
+        kept = self.grid.cells[shift * width:self.next_y * width]
+        grid.cells[:len(kept)] = kept
+        self.grid = grid
+        self.next_y -= shift
+        self.scrolled += shift
+        for _ in range(shift // self.step):
+            self.links.popleft()
+
+        # Seal the new top edge, then reconnect the top row of rooms
+        grid.cells[:width] = bytes([self.fill]) * width
+        self._reconnect()
+
+        self._carve()
+        return shift
+
+    def _reconnect(self):
+        # Union-find over the rooms left in the window. Top row rooms in different
+        # regions are joined through their separator, then the generator's regions for
+        # the next row are recounted to match, so it never joins them a second time
+        # further down; the maze stays a tree, which wall following needs.
+        cols = self.cols
+        rows = len(self.links)
+        parent = list(range(cols * rows))
+
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        for r, (right_row, down_row) in enumerate(self.links):
+            base = r * cols
+            for c in range(cols - 1):
+                if right_row[c]:
+                    parent[find(base + c + 1)] = find(base + c)
+            if r < rows - 1:
+                for c in range(cols):
+                    if down_row[c]:
+                        parent[find(base + cols + c)] = find(base + c)
+
+        top_right = self.links[0][0]
+        for c in range(cols - 1):
+            if find(c) != find(c + 1):
+                parent[find(c + 1)] = find(c)
+                top_right[c] = 1
+                x = c * self.step + self.step
+                for y in range(1, 1 + self.cell_size):
+                    self.grid.cells[y * self.width + x] = DOT | (self.fill & SEEN)
+
+        # Rooms below an opening join the region above it; the rest start new ones
+        base = (rows - 1) * cols
+        last_down = self.links[-1][1]
+        renumbered = {}
+        fresh = 0
+        for c in range(cols):
+            if last_down[c]:
+                root = find(base + c)
+                label = renumbered.get(root)
+                if label is None:
+                    label = renumbered[root] = fresh
+                    fresh += 1
+            else:
+                label = fresh
+                fresh += 1
+            self.labels[c] = label
@@ -0,0 +1,75 @@
+# fov.py
+
+from package.grid import WALL, SEEN
+
+# (xx, xy, yx, yy) transforms from octant coordinates onto the grid, one per octant
+OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+def reveal_fov(grid, x, y, radius):
+    """
+    Lifts the fog of war on every cell visible from (x, y) within radius.
+
+    Uses recursive shadowcasting: each octant is scanned row by row outwards, and a wall
+    splits the light into a narrower cone for the rows behind it. Walls that stop the
+    light are revealed too, so the map shows the corridors the player can actually see.
+    Only visible cells are visited, so the cost does not grow with the maze size. The
+    recursion runs from an explicit stack of cones.
+
+    Parameters:
+        grid (Grid): The maze.
+        x (int): Viewer's X position.
+        y (int): Viewer's Y position.
+        radius (int): How far the viewer can see, in cells.
+    """
+    cells = grid.cells
+    width = grid.width
+    height = grid.height
+    radius_squared = radius * radius
+    cells[y * width + x] |= SEEN
+
+    for xx, xy, yx, yy in OCTANTS:
+        # Cones of light still to scan: (first row, start slope, end slope)
+        cones = [(1, 1.0, 0.0)]
+        while cones:
+            row, start, end = cones.pop()
+            if start < end:
+                continue
+            for distance in range(row, radius + 1):
+                dy = -distance
+                blocked = False
+                next_start = start
+                for dx in range(-distance, 1):
+                    left_slope = (dx - 0.5) / (dy + 0.5)
+                    right_slope = (dx + 0.5) / (dy - 0.5)
+                    if start < right_slope:
+                        continue
+                    if end > left_slope:
+                        break
+
+                    map_x = x + dx * xx + dy * xy
+                    map_y = y + dx * yx + dy * yy
+                    if 0 <= map_x < width and 0 <= map_y < height:
+                        index = map_y * width + map_x
+                        if dx * dx + dy * dy <= radius_squared:
+                            cells[index] |= SEEN
+                        wall = cells[index] & WALL
+                    else:
+                        wall = True
+
+                    if blocked:
+                        if wall:
+                            next_start = right_slope
+                        else:
+                            blocked = False
+                            start = next_start
+                    elif wall and distance < radius:
+                        # The wall's shadow splits the light; scan the part before it later
+                        blocked = True
+                        cones.append((distance + 1, start, left_slope))
+                        next_start = right_slope
+                if blocked:
+                    break
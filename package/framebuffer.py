@@ -0,0 +1,123 @@
+# framebuffer.py
+
+from array import array
+
+
+class FrameBuffer:
+    """
+    Off-screen character and attribute grid that frames are rendered into.
+
+    Each frame is drawn into the back buffer, then flush() compares it with the front
+    buffer (what is already on screen). Unchanged rows are skipped, and the changed span
+    of every other row is written row-major with one addstr per run of equal attribute.
+    """
+
+    def __init__(self, width, height):
+        self.width = 0
+        self.height = 0
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        self.width = max(0, width)
+        self.height = max(0, height)
+        self.chars = [[' '] * self.width for _ in range(self.height)]
+        self.attrs = [[0] * self.width for _ in range(self.height)]
+        self.front_chars = None
+        self.front_attrs = None
+
+    def clear(self):
+        blank_chars = [' '] * self.width
+        blank_attrs = [0] * self.width
+        for y in range(self.height):
+            self.chars[y][:] = blank_chars
+            self.attrs[y][:] = blank_attrs
+
+    def put(self, y, x, ch, attr=0):
+        if 0 <= y < self.height and 0 <= x < self.width:
+            self.chars[y][x] = ch
+            self.attrs[y][x] = attr
+
+    def put_str(self, y, x, text, attr=0):
+        if not 0 <= y < self.height:
+            return
+        if x < 0:
+            text = text[-x:]
+            x = 0
+        text = text[:self.width - x]
+        if text:
+            self.chars[y][x:x + len(text)] = text
+            self.attrs[y][x:x + len(text)] = [attr] * len(text)
+
+    def put_row(self, y, x, chars, attrs):
+        # Writes a run of characters with per-cell attributes, clipped to the right edge
+        if 0 <= y < self.height and 0 <= x < self.width:
+            width = min(len(chars), self.width - x)
+            self.chars[y][x:x + width] = chars[:width]
+            self.attrs[y][x:x + width] = attrs[:width]
+
+    def get_block(self, x, width):
+        """
+        Returns a copy of the columns [x, x + width) of every row as (chars, attrs):
+        a tuple of one string per row and a tuple of one attribute array per row, which
+        take far less memory than lists of cells.
+        """
+        return (tuple(''.join(row[x:x + width]) for row in self.chars),
+                tuple(array('I', row[x:x + width]) for row in self.attrs))
+
+    def put_block(self, x, block):
+        """
+        Pastes a block previously taken with get_block back at column x.
+        """
+        chars, attrs = block
+        for y in range(min(self.height, len(chars))):
+            width = len(chars[y])
+            self.chars[y][x:x + width] = chars[y]
+            self.attrs[y][x:x + width] = attrs[y]
+
+    def flush(self, target):
+        """
+        Writes the rows that differ from the previous frame to a render target.
+
+        Returns:
+            int: Number of writes made to the target.
+        """
+        writes = 0
+        full = self.front_chars is None
+        for y in range(self.height):
+            row_chars = self.chars[y]
+            row_attrs = self.attrs[y]
+
+            # Narrow the row down to the span between its first and last changed cells
+            first = 0
+            last = self.width
+            if not full:
+                front_chars = self.front_chars[y]
+                front_attrs = self.front_attrs[y]
+                if row_chars == front_chars and row_attrs == front_attrs:
+                    continue
+                while row_chars[first] == front_chars[first] and row_attrs[first] == front_attrs[first]:
+                    first += 1
+                while row_chars[last - 1] == front_chars[last - 1] and row_attrs[last - 1] == front_attrs[last - 1]:
+                    last -= 1
+
+            # Write the span with one call per run of equal attribute
+            x = first
+            while x < last:
+                attr = row_attrs[x]
+                end = x + 1
+                while end < last and row_attrs[end] == attr:
+                    end += 1
+                target.write(y, x, ''.join(row_chars[x:end]), attr)
+                writes += 1
+                x = end
+
+        # What was drawn is now on screen
+        if full:
+            self.front_chars = [list(row) for row in self.chars]
+            self.front_attrs = [list(row) for row in self.attrs]
+        else:
+            for y in range(self.height):
+                self.front_chars[y][:] = self.chars[y]
+                self.front_attrs[y][:] = self.attrs[y]
+
+        return writes
@@ -0,0 +1,94 @@
+# grid.py
+
+# Cell flag bits; a cell is one byte holding any combination of them
+WALL = 1   # Solid wall
+EXIT = 2   # Level exit
+DOT = 4    # Breadcrumb the player has not eaten yet
+SEEN = 8   # Revealed on the map (fog of war lifted)
+
+# Grid.translated tables mapping each cell value to 1 if the cell can be walked
+# through (OPEN_MASK) or is a wall (WALL_MASK), else 0
+OPEN_MASK = bytes(0 if value & WALL else 1 for value in range(256))
+WALL_MASK = bytes(1 if value & WALL else 0 for value in range(256))
+
+# Map character for every cell value: walls, then the exit, then uneaten dots
+CELL_CHARS = ''.join(
+    '#' if value & WALL else 'X' if value & EXIT else '.' if value & DOT else ' '
+    for value in range(256)
+)
+
+
+class Grid:
+    """
+    Compact maze storage: one byte of flag bits per cell in a single bytearray.
+
+    The maze, the fog of war and the breadcrumbs all live in the same grid, so the
+    generator, renderer, AI and fog code share it without conversions. Cells are stored
+    row-major; the cell at (x, y) is cells[y * width + x]. cells is normally a bytearray,
+    but any writable byte buffer works, such as a view of a memory-mapped maze file.
+    """
+
+    def __init__(self, width, height, fill=0):
+        self.width = width
+        self.height = height
+        self.cells = bytearray([fill]) * (width * height)
+
+    @classmethod
+    def from_buffer(cls, width, height, cells):
+        """
+        Wraps an existing writable buffer of width * height cells, with no copy.
+        """
+        grid = cls(0, 0)
+        grid.width = width
+        grid.height = height
+        grid.cells = cells
+        return grid
+
+    def row(self, y):
+        """
+        Returns a writable view of row y, with no copy.
+        """
+        return memoryview(self.cells)[y * self.width:(y + 1) * self.width]
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get(self, x, y):
+        return self.cells[y * self.width + x]
+
+    def has(self, x, y, flag):
+        return self.cells[y * self.width + x] & flag != 0
+
+    def is_wall(self, x, y):
+        return self.cells[y * self.width + x] & WALL != 0
+
+    def set_flag(self, x, y, flag):
+        self.cells[y * self.width + x] |= flag
+
+    def clear_flag(self, x, y, flag):
+        self.cells[y * self.width + x] &= ~flag & 0xFF
+
+    def set_flag_all(self, flag):
+        self.cells[:] = self.translated(bytes((value | flag) & 0xFF for value in range(256)))
+
+    def translated(self, table):
+        """
+        Returns a copy of the cells with every value mapped through a 256-byte table.
+        """
+        cells = self.cells
+        if not isinstance(cells, (bytes, bytearray)):
+            cells = bytes(cells)
+        return cells.translate(table)
+
+    def find_flag(self, flag):
+        """
+        Returns the (x, y) position of every cell that has the given flag set.
+        """
+        # Map every cell to 1 or 0 in C, then search the result for the ones
+        marks = self.translated(bytes(1 if value & flag else 0 for value in range(256)))
+        positions = []
+        index = marks.find(1)
+        while index != -1:
+            positions.append((index % self.width, index // self.width))
+            index = marks.find(1, index + 1)
+        return positions
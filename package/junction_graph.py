@@ -0,0 +1,234 @@
+# junction_graph.py
+
+import heapq
+from array import array
+
+from package.grid import OPEN_MASK
+from package.planner import STEPS, get_heuristic
+
+# node_of_cell and edge_of_cell value of cells that are not a node or not on an edge
+NONE = -1
+
+# Cell codes are 8 * open + number of open neighbours; a node is an open cell without
+# exactly two open neighbours, where a path can branch or ends
+_NODE_CODES = bytes(1 if value >= 8 and value != 10 else 0 for value in range(256))
+
+
+class JunctionGraph:
+    """
+    A maze collapsed into a weighted graph of the cells where decisions are made.
+
+    Nodes are the junctions and dead ends (open cells without exactly two open
+    neighbours) and the goal cells. Edges are the corridors between them, weighted by
+    their length in steps. Each corridor cell maps to its edge and its distance from the
+    edge's first node, so a player anywhere in the maze joins the graph at the two ends
+    of their corridor. In mazes of one-cell passages the graph has a fraction of the
+    cells of the grid; in wide open passages nearly every cell is a junction, and it
+    saves little.
+    """
+
+    def __init__(self, grid, goals):
+        self.goals = list(goals)
+        self.width = width = grid.width
+        self.height = height = grid.height
+        size = width * height
+        self.open_cells = open_cells = grid.translated(OPEN_MASK)
+
+        # Sum the four neighbours of every cell at once, as big integers holding a cell
+        # per byte; no byte exceeds 12, so nothing carries into the next cell
+        mask = int.from_bytes(open_cells, 'little')
+        codes = ((mask << 3) + (mask << 8) + (mask >> 8) +
+                 (mask << (8 * width)) + (mask >> (8 * width)))
+        codes = bytearray((codes & ((1 << (8 * size)) - 1)).to_bytes(size, 'little'))
+        # The shifts wrap rows around at the left and right edges; recount those cells
+        for y in range(height):
+            for x in (0, width - 1):
+                index = y * width + x
+                codes[index] = 8 * open_cells[index] + sum(
+                    1 for dx, dy in STEPS
+                    if 0 <= x + dx < width and 0 <= y + dy < height and
+                    open_cells[(y + dy) * width + x + dx])
+
+        marks = codes.translate(_NODE_CODES)
+        for x, y in self.goals:
+            marks[y * width + x] = 1
+
+        self.node_cells = node_cells = []
+        self.node_of_cell = node_of_cell = array('i', [NONE]) * size
+        index = marks.find(1)
+        while index != -1:
+            node_of_cell[index] = len(node_cells)
+            node_cells.append(index)
+            index = marks.find(1, index + 1)
+        self.goal_nodes = {node_of_cell[y * width + x] for x, y in self.goals}
+        self.heuristic = get_heuristic(self.goals) if self.goals else None
+
+        # (first node, second node, length, direction out of the first, out of the second)
+        self.edges = []
+        # Per node: (neighbouring node, length, edge) for each corridor leaving it
+        self.adjacency = [[] for _ in node_cells]
+        self.edge_of_cell = array('i', [NONE]) * size
+        self.offset_of_cell = array('i', [0]) * size
+        for node, index in enumerate(node_cells):
+            for direction in range(4):
+                first = self._step(index, direction)
+                if first is None:
+                    continue
+                if node_of_cell[first] != NONE:
+                    # Neighbouring nodes; add the edge from the lower numbered end only
+                    if node < node_of_cell[first]:
+                        self._add_edge(node, node_of_cell[first], 1, direction, (direction + 2) % 4)
+                elif self.edge_of_cell[first] == NONE:
+                    self._trace(node, index, first, direction)
+
+    def _step(self, index, direction):
+        # Index of the open cell next to index in a direction, or None
+        x = index % self.width + STEPS[direction][0]
+        y = index // self.width + STEPS[direction][1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            neighbour = y * self.width + x
+            if self.open_cells[neighbour]:
+                return neighbour
+        return None
+
+    def _trace(self, node, previous, current, direction):
+        # Follow a corridor from node to the next node, indexing its cells on the way
+        edge = len(self.edges)
+        offset = 1
+        while self.node_of_cell[current] == NONE:
+            self.edge_of_cell[current] = edge
+            self.offset_of_cell[current] = offset
+            for step in range(4):
+                following = self._step(current, step)
+                if following is not None and following != previous:
+                    break
+            previous, current = current, following
+            offset += 1
+        dx = current % self.width - previous % self.width
+        dy = current // self.width - previous // self.width
+        self._add_edge(node, self.node_of_cell[current], offset, direction,
+                       (STEPS.index((dx, dy)) + 2) % 4)
+
+    def _add_edge(self, node_a, node_b, length, direction_a, direction_b):
+        edge = len(self.edges)
+        self.edges.append((node_a, node_b, length, direction_a, direction_b))
+        self.adjacency[node_a].append((node_b, length, edge))
+        self.adjacency[node_b].append((node_a, length, edge))
+
+    def locate(self, x, y):
+        """
+        Returns where a cell joins the graph: (node, NONE, 0) for a node, (NONE, edge,
+        offset) for a corridor cell, or (NONE, NONE, 0) for a wall or a cell no node
+        can be reached from.
+        """
+        index = y * self.width + x
+        node = self.node_of_cell[index]
+        if node != NONE:
+            return node, NONE, 0
+        edge = self.edge_of_cell[index]
+        return NONE, edge, self.offset_of_cell[index] if edge != NONE else 0
+
+    def find_path(self, start):
+        """
+        Finds a shortest path from start to the nearest goal with A* over the graph.
+
+        Parameters:
+            start (tuple): (x, y) cell to start from.
+
+        Returns:
+            tuple: (path, expansions), where path is the list of (x, y) cells from start
+                to a goal, or None if no goal can be reached, and expansions is the
+                number of graph nodes taken off the open list.
+        """
+        if not self.goals:
+            return None, 0
+        node, edge, offset = self.locate(*start)
+        if node != NONE:
+            entries = [(node, 0)]
+        elif edge != NONE:
+            node_a, node_b, length, _, _ = self.edges[edge]
+            entries = [(node_a, offset), (node_b, length - offset)]
+        else:
+            return None, 0
+
+        node_cells = self.node_cells
+        width = self.width
+        heuristic = self.heuristic
+        costs = {}
+        parents = {}
+        open_list = []
+        for node, cost in entries:
+            if cost < costs.get(node, cost + 1):
+                costs[node] = cost
+                parents[node] = None
+                x, y = node_cells[node] % width, node_cells[node] // width
+                heapq.heappush(open_list, (cost + heuristic(x, y), -cost, node))
+
+        expansions = 0
+        while open_list:
+            _, negative_cost, node = heapq.heappop(open_list)
+            cost = -negative_cost
+            if cost > costs[node]:
+                continue
+            expansions += 1
+            if node in self.goal_nodes:
+                return self._get_path(start, parents, node), expansions
+            for neighbour, length, edge in self.adjacency[node]:
+                new_cost = cost + length
+                if new_cost < costs.get(neighbour, new_cost + 1):
+                    costs[neighbour] = new_cost
+                    parents[neighbour] = (node, edge)
+                    index = node_cells[neighbour]
+                    heapq.heappush(open_list, (new_cost + heuristic(index % width, index // width),
+                                               -new_cost, neighbour))
+        return None, expansions
+
+    def _get_path(self, start, parents, node):
+        # Walk the parent links back to the entry node, then expand every corridor
+        hops = []
+        while parents[node] is not None:
+            previous, edge = parents[node]
+            hops.append((previous, edge))
+            node = previous
+        hops.reverse()
+
+        width = self.width
+        index = start[1] * width + start[0]
+        cells = [index]
+        if self.node_of_cell[index] == NONE:
+            # Start mid-corridor: walk to the entry node, counting the offset down towards
+            # the edge's first node or up towards its second
+            edge = self.edge_of_cell[index]
+            node_a, node_b, length, _, _ = self.edges[edge]
+            offset = self.offset_of_cell[index]
+            if node_a == node_b:
+                step = -1 if offset <= length - offset else 1
+            else:
+                step = -1 if node == node_a else 1
+            while 0 < offset + step < length:
+                offset += step
+                for direction in range(4):
+                    following = self._step(index, direction)
+                    if (following is not None and self.edge_of_cell[following] == edge and
+                            self.offset_of_cell[following] == offset):
+                        break
+                index = following
+                cells.append(index)
+            index = self.node_cells[node]
+            cells.append(index)
+
+        for previous, edge in hops:
+            node_a, node_b, _, direction_a, direction_b = self.edges[edge]
+            direction = direction_a if previous == node_a else direction_b
+            last = index
+            index = self._step(index, direction)
+            cells.append(index)
+            while self.node_of_cell[index] == NONE:
+                for step in range(4):
+                    following = self._step(index, step)
+                    if following is not None and following != last:
+                        break
+                last, index = index, following
+                cells.append(index)
+
+        return [(index % width, index // width) for index in cells]
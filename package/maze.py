@@ -1,102 +1,379 @@
 import random
 
-# Generate a 16x18 maze with an 'X' exit and a path to it, with wider passages
-def get_maze():
-    width = 16
-    height = 18
-    cell_size = 2  # Increase to make passages wider
+from package.grid import Grid, WALL, EXIT, DOT, SEEN, OPEN_MASK
 
-    # Adjust the maze dimensions based on cell size
-    maze_width = width
-    maze_height = height
+# Name of the generation algorithm used when none is chosen, also part of cache keys
+DEFAULT_ALGORITHM = 'division'
 
-    # Initialize the maze grid with walls ('#')
-    maze = [['#' for _ in range(maze_width)] for _ in range(maze_height)]
+# Maps a passage flag (0 closed, 1 open) to the cell it leaves in the wall
+_LINK_CELLS = bytes([WALL, DOT]) + bytes([WALL]) * 254
 
-    # Function to carve out rooms/cells
-    def carve_room(x, y):
-        for i in range(cell_size):
-            for j in range(cell_size):
-                maze[y + i][x + j] = ' '
+# Generate a maze (16x18 by default) with an 'X' exit and a path to it, with wider passages
+# the same seed always gives the same maze; without one every maze is different
+# algorithm names one of the GENERATORS below
+def get_maze(width=16, height=18, cell_size=2, seed=None, algorithm=DEFAULT_ALGORITHM):
+    if width < 3 or height < 3:
+        raise ValueError("Maze must be at least 3x3.")
+    if cell_size < 1:
+        raise ValueError("cell_size must be at least 1.")
+    generate = GENERATORS.get(algorithm)
+    if generate is None:
+        raise ValueError(f"Unknown maze algorithm: {algorithm}")
 
-    # Recursive function to divide the maze
-    def divide(x, y, w, h, orientation):
-        if w < cell_size * 2 or h < cell_size * 2:
-            return
+    # A private generator keeps the maze reproducible whatever else uses the random module
+    rng = random.Random(seed)
 
-        horizontal = orientation == 'H'
+    grid = generate(width, height, cell_size, rng)
+    place_exit(grid, rng)
+    return grid
 
-        if horizontal:
-            wy = y + random.randrange(cell_size, h - cell_size, cell_size + 1)
-            px = x + random.randrange(0, w, cell_size + 1)
-            dx = x
-            for i in range(w):
-                if dx + i != px:
-                    maze[wy][dx + i] = '#'
-            divide(x, y, w, wy - y, choose_orientation(w, wy - y))
-            divide(x, wy + 1, w, y + h - wy - 1, choose_orientation(w, y + h - wy - 1))
-        else:
-            wx = x + random.randrange(cell_size, w - cell_size, cell_size + 1)
-            py = y + random.randrange(0, h, cell_size + 1)
-            dy = y
-            for i in range(h):
-                if dy + i != py:
-                    maze[dy + i][wx] = '#'
-            divide(x, y, wx - x, h, choose_orientation(wx - x, h))
-            divide(wx + 1, y, x + w - wx - 1, h, choose_orientation(x + w - wx - 1, h))
-
-    # Function to choose orientation
-    def choose_orientation(w, h):
-        if w < h:
-            return 'H'
-        elif h < w:
-            return 'V'
-        else:
-            return random.choice(['H', 'V'])
-
-    # Carve initial empty space
-    for y in range(1, maze_height - 1):
-        for x in range(1, maze_width - 1):
-            maze[y][x] = ' '
 
-    # Start dividing the maze
-    divide(1, 1, maze_width - 2, maze_height - 2, choose_orientation(maze_width - 2, maze_height - 2))
-
-    # Place the exit 'X' at a random position on the maze edge
+# Place the exit 'X' at a random position on the maze edge, next to an open cell
+def place_exit(grid, rng):
+    maze_width = grid.width
+    maze_height = grid.height
     edge_positions = []
     for x in range(1, maze_width - 1):
-        if maze[1][x] == ' ':
+        if grid.get(x, 1) == DOT:
             edge_positions.append((x, 0))
-        if maze[maze_height - 2][x] == ' ':
+        if grid.get(x, maze_height - 2) == DOT:
             edge_positions.append((x, maze_height - 1))
     for y in range(1, maze_height - 1):
-        if maze[y][1] == ' ':
+        if grid.get(1, y) == DOT:
             edge_positions.append((0, y))
-        if maze[y][maze_width - 2] == ' ':
+        if grid.get(maze_width - 2, y) == DOT:
             edge_positions.append((maze_width - 1, y))
     if edge_positions:
-        exit_x, exit_y = random.choice(edge_positions)
-        maze[exit_y][exit_x] = 'X'
+        exit_x, exit_y = rng.choice(edge_positions)
     else:
         # Place exit at a corner if no edge positions are available
-        maze[1][1] = 'X'
+        exit_x, exit_y = 1, 1
+    grid.cells[exit_y * maze_width + exit_x] = EXIT
+
+
+# Recursive division: split open space with walls that each leave one gap
+# fast and shallow, with long straight walls
+def generate_division(maze_width, maze_height, cell_size, rng):
+    # Initialize the maze grid: solid border walls around an open floor of dots
+    grid = Grid(maze_width, maze_height, DOT)
+    cells = grid.cells
+    wall_row = bytes([WALL]) * max(maze_width, maze_height)
+    cells[:maze_width] = wall_row[:maze_width]
+    cells[-maze_width:] = wall_row[:maze_width]
+    cells[::maze_width] = wall_row[:maze_height]
+    cells[maze_width - 1::maze_width] = wall_row[:maze_height]
+
+    # Random positions are drawn with one random() call each; randrange is several
+    # times slower and dominates generation time on large mazes
+    rand = rng.random
+    step = cell_size + 1
+    min_size = cell_size * 2
+
+    # Divide the maze with an explicit stack instead of recursion, so large mazes
+    # cannot hit the recursion limit. Regions too small to divide are never pushed.
+    stack = [(1, 1, maze_width - 2, maze_height - 2)]
+    while stack:
+        x, y, w, h = stack.pop()
+
+        # Choose orientation: cut across the longer side, randomly for squares
+        if w < h:
+            horizontal = True
+        elif h < w:
+            horizontal = False
+        else:
+            horizontal = rand() < 0.5
+
+        if horizontal:
+            if h <= min_size:
+                continue  # No room for a wall between two passages
+            wy = y + cell_size + step * int(rand() * ((h - cell_size) // step))
+            px = x + step * int(rand() * ((w + cell_size) // step))
+            start = wy * maze_width + x
+            cells[start:start + w] = wall_row[:w]
+            cells[wy * maze_width + px] = DOT
+            if w >= min_size:
+                if wy - y >= min_size:
+                    stack.append((x, y, w, wy - y))
+                if y + h - wy - 1 >= min_size:
+                    stack.append((x, wy + 1, w, y + h - wy - 1))
+        else:
+            if w <= min_size:
+                continue  # No room for a wall between two passages
+            wx = x + cell_size + step * int(rand() * ((w - cell_size) // step))
+            py = y + step * int(rand() * ((h + cell_size) // step))
+            start = y * maze_width + wx
+            cells[start:start + h * maze_width:maze_width] = wall_row[:h]
+            cells[py * maze_width + wx] = DOT
+            if h >= min_size:
+                if wx - x >= min_size:
+                    stack.append((x, y, wx - x, h))
+                if x + w - wx - 1 >= min_size:
+                    stack.append((wx + 1, y, x + w - wx - 1, h))
+
+    return grid
+
+
+# The other generators carve a perfect maze on a lattice of rooms: each room is
+# cell_size x cell_size open cells, with a one-cell wall between neighbouring rooms.
+# Passages are recorded per room as flags: right[i] opens the wall east of room i and
+# down[i] the wall south of it, with rooms numbered row by row.
+def get_lattice(width, height, cell_size):
+    cell_size = min(cell_size, width - 2, height - 2)
+    step = cell_size + 1
+    return cell_size, (width - 1) // step, (height - 1) // step
+
+
+# Carve a row of rooms whose top is grid row y, and the passages south of it, into an
+# all-wall grid; the rooms of lattice row r start at y = 1 + r * (cell_size + 1)
+def carve_lattice_row(grid, cell_size, y, right_row, down_row):
+    width = grid.width
+    cells = grid.cells
+    cols = len(right_row)
+    step = cell_size + 1
+    end = 1 + cols * step
+    open_rooms = bytes([DOT]) * cols
+
+    line = bytearray([WALL]) * width
+    for dx in range(cell_size):
+        line[1 + dx:end:step] = open_rooms
+    line[1 + cell_size:end:step] = right_row.translate(_LINK_CELLS)
+    for dy in range(cell_size):
+        cells[(y + dy) * width:(y + dy + 1) * width] = line
+
+    if any(down_row):
+        line = bytearray([WALL]) * width
+        openings = down_row.translate(_LINK_CELLS)
+        for dx in range(cell_size):
+            line[1 + dx:end:step] = openings
+        y += cell_size
+        cells[y * width:(y + 1) * width] = line
+
+
+# Carve complete right/down passage flags into a new grid
+def carve_lattice(width, height, cell_size, cols, rows, right, down):
+    grid = Grid(width, height, WALL)
+    for r in range(rows):
+        carve_lattice_row(grid, cell_size, 1 + r * (cell_size + 1),
+                          right[r * cols:(r + 1) * cols], down[r * cols:(r + 1) * cols])
+    return grid
+
+
+# Kruskal: open walls in random order whenever they join two unconnected regions
+# regions are tracked with a path-compressed union-find over every room
+def generate_kruskal(width, height, cell_size, rng):
+    cell_size, cols, rows = get_lattice(width, height, cell_size)
+    rooms = cols * rows
+    right = bytearray(rooms)
+    down = bytearray(rooms)
+
+    # Wall e < rooms is east of room e; wall e >= rooms is south of room e - rooms
+    walls = [e for e in range(rooms) if e % cols != cols - 1]
+    walls.extend(range(rooms, 2 * rooms - cols))
+    rng.shuffle(walls)
+
+    parent = list(range(rooms))
+    remaining = rooms - 1
+    for e in walls:
+        if e < rooms:
+            a = e
+            b = e + 1
+        else:
+            a = e - rooms
+            b = a + cols
+        # Find both roots, halving the paths on the way
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a != b:
+            parent[b] = a
+            if e < rooms:
+                right[e] = 1
+            else:
+                down[e - rooms] = 1
+            remaining -= 1
+            if not remaining:
+                break
+
+    return carve_lattice(width, height, cell_size, cols, rows, right, down)
+
+
+# Wilson: loop-erased random walks from every room until they hit the maze so far
+# gives an unbiased maze, but the first walks are long, so it is slow on large grids
+def generate_wilson(width, height, cell_size, rng):
+    cell_size, cols, rows = get_lattice(width, height, cell_size)
+    rooms = cols * rows
+    right = bytearray(rooms)
+    down = bytearray(rooms)
+    rand = rng.random
+
+    in_maze = bytearray(rooms)
+    in_maze[int(rand() * rooms)] = 1
+    exits = bytearray(rooms)  # Direction each room was last left in; overwriting erases loops
+
+    for start in range(rooms):
+        # Walk at random until the walk reaches the maze
+        room = start
+        while not in_maze[room]:
+            direction = int(rand() * 4)
+            if direction == 0:
+                if room % cols == cols - 1:
+                    continue
+                nxt = room + 1
+            elif direction == 1:
+                if room % cols == 0:
+                    continue
+                nxt = room - 1
+            elif direction == 2:
+                if room >= rooms - cols:
+                    continue
+                nxt = room + cols
+            else:
+                if room < cols:
+                    continue
+                nxt = room - cols
+            exits[room] = direction
+            room = nxt
+
+        # Add the loop-erased walk to the maze
+        room = start
+        while not in_maze[room]:
+            in_maze[room] = 1
+            direction = exits[room]
+            if direction == 0:
+                right[room] = 1
+                room += 1
+            elif direction == 1:
+                room -= 1
+                right[room] = 1
+            elif direction == 2:
+                down[room] = 1
+                room += cols
+            else:
+                room -= cols
+                down[room] = 1
+
+    return carve_lattice(width, height, cell_size, cols, rows, right, down)
+
+
+# Eller: build the maze one row of rooms at a time, keeping only the current row's
+# region labels, so memory grows with the width alone
+def generate_eller(width, height, cell_size, rng):
+    cell_size, cols, rows = get_lattice(width, height, cell_size)
+    grid = Grid(width, height, WALL)
+    for r, (right_row, down_row) in enumerate(eller_rows(cols, rows, rng)):
+        carve_lattice_row(grid, cell_size, 1 + r * (cell_size + 1), right_row, down_row)
+    return grid
+
+
+# Yield (right_row, down_row) passage flags for each row of an Eller maze
+# rows=None keeps going forever, for mazes that are streamed rather than stored
+# labels, if given, is the region of each room in the next row, in [0, cols); it is
+# updated in place after every row, and the caller may rewrite it between rows
+def eller_rows(cols, rows, rng, labels=None):
+    rand = rng.random
+    if labels is None:
+        labels = list(range(cols))
+    r = 0
+    while rows is None or r < rows:
+        last = rows is not None and r == rows - 1
+        right_row = bytearray(cols)
+        down_row = bytearray(cols)
+
+        # Join neighbours from different regions at random; the last row joins them all
+        parent = list(range(cols))
+        for c in range(cols - 1):
+            a = labels[c]
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            b = labels[c + 1]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a != b and (last or rand() < 0.5):
+                parent[b] = a
+                right_row[c] = 1
+        for c in range(cols):
+            a = labels[c]
+            while parent[a] != a:
+                a = parent[a]
+            labels[c] = a
+
+        if not last:
+            # Every region continues down at least once so none is cut off
+            members = {}
+            for c in range(cols):
+                members.setdefault(labels[c], []).append(c)
+            for region in members.values():
+                opened = False
+                for c in region:
+                    if rand() < 0.5:
+                        down_row[c] = 1
+                        opened = True
+                if not opened:
+                    down_row[region[int(rand() * len(region))]] = 1
+
+            # Rooms below an opening stay in their region; the rest start new ones.
+            # Labels are renumbered so they always fit in [0, cols).
+            renumbered = {}
+            next_labels = [0] * cols
+            fresh = 0
+            for c in range(cols):
+                if down_row[c]:
+                    label = renumbered.get(labels[c])
+                    if label is None:
+                        label = renumbered[labels[c]] = fresh
+                        fresh += 1
+                    next_labels[c] = label
+                else:
+                    next_labels[c] = fresh
+                    fresh += 1
+            labels[:] = next_labels
+
+        yield right_row, down_row
+        r += 1
+
 
-    # Replace spaces with dots to fill the maze with dots
-    for y in range(maze_height):
-        for x in range(maze_width):
-            if maze[y][x] == ' ':
-                maze[y][x] = '.'
+# Registered generators by name; each is called as generate(width, height, cell_size, rng)
+# and returns a grid of WALL and DOT cells with the border walled in
+GENERATORS = {
+    'division': generate_division,
+    'kruskal': generate_kruskal,
+    'wilson': generate_wilson,
+    'eller': generate_eller,
+}
 
-    # Convert maze grid to a list of strings
-    maze_strings = [''.join(row) for row in maze]
 
-    return maze_strings
+# Count the shape features that make a maze interesting: open cells, dead ends (one
+# open neighbour) and junctions (three or more), used by the generation benchmark
+def get_maze_stats(grid):
+    width = grid.width
+    open_mask = grid.translated(OPEN_MASK)
+    open_cells = 0
+    dead_ends = 0
+    junctions = 0
+    for y in range(1, grid.height - 1):
+        above = open_mask[(y - 1) * width:y * width]
+        row = open_mask[y * width:(y + 1) * width]
+        below = open_mask[(y + 1) * width:(y + 2) * width]
+        for x in range(1, width - 1):
+            if row[x]:
+                open_cells += 1
+                neighbours = above[x] + below[x] + row[x - 1] + row[x + 1]
+                if neighbours == 1:
+                    dead_ends += 1
+                elif neighbours >= 3:
+                    junctions += 1
+    return {'open_cells': open_cells, 'dead_ends': dead_ends, 'junctions': junctions}
 
 
-# generate a 18x16 fog of war true/false map
-# False means the player has not visited the cell
-# this will be used later for rendering the mini-map
-def get_fog(mFogOfWar):
-    # Initialize the fog grid with False values
-    fog = [[not mFogOfWar for _ in range(16)] for _ in range(18)]
-    return fog
\ No newline at end of file
+# apply the fog of war to a freshly generated maze grid
+# cells without the SEEN flag have not been revealed to the player yet
+# without fog of war the whole mini-map is revealed from the start
+def get_fog(mFogOfWar, grid):
+    if not mFogOfWar:
+        grid.set_flag_all(SEEN)
+    return grid
@@ -0,0 +1,125 @@
+# maze_cache.py
+
+import hashlib
+import os
+
+from package.maze_file import MazeFile, MazeFileError, save_maze
+
+# Bumped whenever the generator would produce a different maze for the same key
+CACHE_VERSION = 2
+
+# Mazes smaller than this are quicker to generate than to read back from disk
+MIN_CACHED_CELLS = 250000
+
+# Disk space the cache may take up; the least recently used mazes are deleted past it
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def get_cache_dir():
+    """
+    Returns the default maze cache directory, following XDG_CACHE_HOME when set.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'labrync', 'mazes')
+
+
+class MazeCache:
+    """
+    Content-addressed on-disk cache of generated mazes.
+
+    A seeded maze is fully determined by (algorithm, size, cell size, seed), so the hash
+    of those values names the file holding its grid. Files are unpacked maze files, so a
+    hit is memory-mapped rather than read. Unseeded mazes are never cached. Unreadable
+    or mismatched files are treated as misses and regenerated. Once the files take up
+    more than max_bytes, the least recently used ones are deleted.
+    """
+
+    def __init__(self, directory=None, min_cells=MIN_CACHED_CELLS, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory or get_cache_dir()
+        self.min_cells = min_cells
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, algorithm, width, height, cell_size, seed):
+        key = f"{algorithm}:{CACHE_VERSION}:{width}x{height}:{cell_size}:{seed}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.maze')
+
+    def get_maze(self, get_maze_func, algorithm, width, height, cell_size, seed):
+        """
+        Returns the maze for these parameters, from disk when it has been generated before.
+
+        Parameters:
+            get_maze_func (function): Generator called as get_maze_func(width, height,
+                cell_size, seed, algorithm) on a miss.
+            algorithm (str): Name of the generation algorithm, part of the key.
+            width (int): Maze width in cells.
+            height (int): Maze height in cells.
+            cell_size (int): Passage width of the maze.
+            seed (int): Generator seed, or None to generate without caching.
+
+        Returns:
+            Grid: The maze.
+        """
+        if seed is None or width * height < self.min_cells:
+            return get_maze_func(width, height, cell_size, seed, algorithm)
+
+        path = self.path_for(algorithm, width, height, cell_size, seed)
+        grid = self._load(path, width, height, seed)
+        if grid is not None:
+            self.hits += 1
+            return grid
+
+        self.misses += 1
+        grid = get_maze_func(width, height, cell_size, seed, algorithm)
+        self._store(path, grid, seed)
+        return grid
+
+    def _load(self, path, width, height, seed):
+        try:
+            maze_file = MazeFile(path)
+        except (OSError, MazeFileError):
+            return None
+        if (maze_file.width, maze_file.height, maze_file.seed) != (width, height, seed):
+            return None
+        try:
+            # The modification time records when the maze was last used, for _trim()
+            os.utime(path)
+        except OSError:
+            pass
+        return maze_file.grid
+
+    def _store(self, path, grid, seed):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            save_maze(path, grid, seed)
+        except OSError:
+            return  # The cache is only an optimization; generation already succeeded
+        self._trim()
+
+    def _trim(self):
+        # Deletes the least recently used mazes until the cache fits in max_bytes
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.maze'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                files.append((info.st_mtime, info.st_size, path))
+                total += info.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                # Processes still playing the maze keep their memory-mapped copy
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
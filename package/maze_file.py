@@ -0,0 +1,139 @@
+# maze_file.py
+
+import mmap
+import os
+import struct
+import tempfile
+
+from package.grid import Grid, SEEN
+
+# File header: magic, format version, flags, width, height, seed, and the offset of the
+# cell data from the start of the file
+HEADER = struct.Struct('<4sHHIIQI')
+MAGIC = b'LBRM'
+FORMAT_VERSION = 1
+
+# Header flags
+PACKED = 1    # Two cells per byte (low nibble first) instead of one
+HAS_SEED = 2  # The seed field holds the seed the maze was generated from
+
+# Fog of war is per game, so it is never written to a file
+_STRIP_SEEN = bytes(value & ~SEEN & 0x0F for value in range(256))
+
+# Nibble tables for packing and unpacking two cells per byte
+_HIGH_NIBBLE = bytes((value & ~SEEN & 0x0F) << 4 for value in range(256))
+_UNPACK_LOW = bytes(value & 0x0F for value in range(256))
+_UNPACK_HIGH = bytes(value >> 4 for value in range(256))
+
+
+class MazeFileError(ValueError):
+    """
+    Raised when a file is not a maze file this version can read.
+    """
+
+
+class MazeFile:
+    """
+    A maze file opened for reading: its header values and its grid.
+
+    Unpacked files hold one byte per cell, exactly as Grid stores them, so the grid's
+    cells are a view straight into a private (copy-on-write) memory mapping of the file.
+    Opening a huge maze costs no reading or copying up front; pages are read in as the
+    game touches them, and every process that maps the same file shares them until it
+    writes to a page (eating dots, lifting fog). Packed files are half the size but
+    are unpacked into memory when opened.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise MazeFileError(f"{path}: too short for a maze file")
+            magic, version, flags, width, height, seed, offset = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise MazeFileError(f"{path}: not a maze file")
+            if version != FORMAT_VERSION:
+                raise MazeFileError(f"{path}: unsupported maze file version {version}")
+            if width < 3 or height < 3:
+                raise MazeFileError(f"{path}: invalid maze size {width}x{height}")
+
+            count = width * height
+            size = (count + 1) // 2 if flags & PACKED else count
+            if os.fstat(f.fileno()).st_size < offset + size:
+                raise MazeFileError(f"{path}: truncated maze file")
+
+            self.width = width
+            self.height = height
+            self.seed = seed if flags & HAS_SEED else None
+            self.packed = bool(flags & PACKED)
+
+            if self.packed:
+                f.seek(offset)
+                packed = f.read(size)
+                self.grid = Grid(width, height)
+                self.grid.cells[0::2] = packed.translate(_UNPACK_LOW)
+                self.grid.cells[1::2] = packed.translate(_UNPACK_HIGH)[:count // 2]
+            else:
+                # The mapping outlives the file object; the view keeps it open
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+                cells = memoryview(mapping)[offset:offset + count]
+                self.grid = Grid.from_buffer(width, height, cells)
+
+
+def load_maze(path):
+    """
+    Opens a maze file and returns its grid.
+
+    Parameters:
+        path (str): Path to the maze file.
+
+    Returns:
+        Grid: The maze, memory-mapped unless the file is packed.
+
+    Raises:
+        OSError: The file cannot be opened.
+        MazeFileError: The file is not a valid maze file.
+    """
+    return MazeFile(path).grid
+
+
+def save_maze(path, grid, seed=None, packed=False):
+    """
+    Writes a grid to a maze file.
+
+    The file is written to a temporary name and renamed into place, so processes that
+    have the old file mapped keep a consistent maze and new readers never see a
+    partial one.
+
+    Parameters:
+        path (str): Path of the file to write.
+        grid (Grid): The maze; fog of war is not saved.
+        seed (int): Seed the maze was generated from, if known.
+        packed (bool): Store two cells per byte instead of one.
+    """
+    if packed:
+        # Interleave the two nibble streams in one pass of big-integer arithmetic
+        low = grid.translated(_STRIP_SEEN)[0::2]
+        high = grid.translated(_HIGH_NIBBLE)[1::2]
+        data = (int.from_bytes(low, 'little') | int.from_bytes(high, 'little')).to_bytes(len(low), 'little')
+    else:
+        data = grid.translated(_STRIP_SEEN)
+
+    flags = PACKED if packed else 0
+    if seed is not None and 0 <= seed < 1 << 64:
+        flags |= HAS_SEED
+    else:
+        seed = 0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, flags, grid.width, grid.height, seed, HEADER.size)
+
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(data)
+        os.chmod(temp_path, 0o644)  # Readable by every process that shares the maze
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -1,12 +1,10 @@
 # message_box.py
 
-import curses
 import time
 import math
 
 class MessageBox:
-    def __init__(self, stdscr):
-        self.stdscr = stdscr
+    def __init__(self):
         self.active = False
         self.message = ""
         self.duration = 0
@@ -19,16 +17,19 @@ class MessageBox:
         self.start_time = time.time()
         self.active = True
 
+    def hide(self):
+        self.active = False
+
     def update(self):
         if self.active:
             current_time = time.time()
             if current_time - self.start_time >= self.duration:
                 self.active = False
 
-    def render(self):
+    def render(self, framebuffer):
         if self.active:
             # Get screen size
-            max_y, max_x = self.stdscr.getmaxyx()
+            max_y, max_x = framebuffer.height, framebuffer.width
             
             # Define message box dimensions
             width = len(self.message) + 4  # Padding of 2 on each side
@@ -58,24 +59,10 @@ class MessageBox:
             start_y = max(0, min(start_y, max_y - height))
             start_x = max(0, min(start_x, max_x - width))
             
-            # Create a new window with the calculated positions
-            win = curses.newwin(height, width, start_y, start_x)
-            
-            # Set the background color (using color pair 0 for default)
-            win.bkgd(' ', curses.color_pair(0))
-            
-            # Clear the window content
-            win.erase()
-            
-            # Draw the window border
-            win.border()
-            
-            try:
-                # Add the message text at a fixed position within the window
-                # Position (2, 2) centers the text vertically and horizontally within the window
-                win.addstr(2, 2, self.message)
-            except curses.error:
-                pass  # Ignore errors if the message is too long to fit
-            
-            # Refresh the window to display changes
-            win.refresh()
+            # Draw the bordered box with the message at a fixed position inside it
+            inner = width - 2
+            framebuffer.put_str(start_y, start_x, '\u250c' + '\u2500' * inner + '\u2510')
+            for row in range(1, height - 1):
+                framebuffer.put_str(start_y + row, start_x, '\u2502' + ' ' * inner + '\u2502')
+            framebuffer.put_str(start_y + height - 1, start_x, '\u2514' + '\u2500' * inner + '\u2518')
+            framebuffer.put_str(start_y + 2, start_x + 2, self.message)
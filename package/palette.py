@@ -0,0 +1,102 @@
+# palette.py
+
+import curses
+
+from package.shading import NUM_SHADE_LEVELS
+
+# Hues for the distance shade gradient on 8-colour terminals, nearest first.
+# The far half of the gradient reuses them dimmed.
+SHADE_HUES_8 = [
+    curses.COLOR_RED,
+    curses.COLOR_RED,
+    curses.COLOR_GREEN,
+    curses.COLOR_YELLOW,
+    curses.COLOR_BLUE,
+    curses.COLOR_MAGENTA,
+    curses.COLOR_CYAN,
+    curses.COLOR_WHITE,
+]
+
+# 256-colour terminals get a real grayscale ramp (xterm colours 232-255), nearest brightest
+SHADE_RAMP_256 = [255 - (level * 20) // (NUM_SHADE_LEVELS - 1) for level in range(NUM_SHADE_LEVELS)]
+
+# Foreground colours for everything that is not a wall shade
+ROLE_COLORS = {
+    'boundary': curses.COLOR_RED,      # Block edges in the 3D view
+    'floor': curses.COLOR_YELLOW,      # Floor dots in the 3D view
+    'floor_edge': curses.COLOR_WHITE,  # Floor outline in the 3D view
+    'separator': curses.COLOR_RED,     # Separator between the view and the map
+    'fog': curses.COLOR_RED,           # Unexplored map cells
+    'map_wall': curses.COLOR_GREEN,    # Walls on the map
+    'map_floor': curses.COLOR_BLACK,   # Floor on the map
+    'map_exit': curses.COLOR_BLUE,     # Exit on the map
+    'map_dot': curses.COLOR_WHITE,     # Breadcrumb dots on the map
+    'player': curses.COLOR_YELLOW,     # Player icon on the map
+    'walker': curses.COLOR_MAGENTA,    # Other walkers on the map and in the 3D view
+}
+
+
+class Palette:
+    """
+    Precomputed curses attributes for every shade level and screen element.
+
+    A fresh Palette is monochrome (every attribute is 0), which is what headless
+    rendering uses. init_curses() starts colour support once at startup and gives each
+    shade level and role its own colour pair, so the renderer only ever reads integers.
+    """
+
+    def __init__(self):
+        self.use_256_colors = False
+        self.shade_attrs = [0] * NUM_SHADE_LEVELS
+
+        # Each role is exposed as an attribute, e.g. palette.map_wall
+        for role in ROLE_COLORS:
+            setattr(self, role, 0)
+
+    def init_curses(self):
+        """
+        Starts curses colour support and allocates the colour pairs.
+
+        Must be called once after curses has been initialized.
+
+        Returns:
+            Palette: self, for chaining.
+        """
+        if not curses.has_colors():
+            return self
+        curses.start_color()
+        self.use_256_colors = curses.COLORS >= 256
+
+        # Pair 0 is reserved by curses; shade levels come first, then the roles
+        next_pair = 1
+        for level in range(NUM_SHADE_LEVELS):
+            if self.use_256_colors:
+                attr = self._alloc_pair(next_pair, SHADE_RAMP_256[level])
+            else:
+                hue = SHADE_HUES_8[level % len(SHADE_HUES_8)]
+                attr = self._alloc_pair(next_pair, hue)
+                if level >= len(SHADE_HUES_8):
+                    attr |= curses.A_DIM
+            self.shade_attrs[level] = attr
+            next_pair += 1
+
+        for role, color in ROLE_COLORS.items():
+            setattr(self, role, self._alloc_pair(next_pair, color))
+            next_pair += 1
+
+        return self
+
+    def _alloc_pair(self, pair_number, fg_color):
+        # Returns the attribute for a new pair, or 0 if the terminal cannot provide it
+        if pair_number >= curses.COLOR_PAIRS:
+            return 0
+        try:
+            curses.init_pair(pair_number, fg_color, curses.COLOR_BLACK)
+        except curses.error:
+            return 0
+        return curses.color_pair(pair_number)
+
+
+# The palette to render with when none is given; shared, since shade tables and
+# minimap lookups are cached per palette
+MONOCHROME = Palette()
@@ -0,0 +1,62 @@
+# pipeline.py
+
+import queue
+import threading
+
+
+class LevelPipeline:
+    """
+    Builds upcoming levels on a background thread while the current level is played.
+
+    make_level is called with no arguments and returns a ready-to-play level (the maze
+    grid with its fog applied, plus any precomputed data). Up to depth finished levels
+    wait in a queue, so starting the next level is a constant-time swap instead of
+    generating a large maze on the main loop.
+    """
+
+    def __init__(self, make_level, depth=2):
+        self.make_level = make_level
+        self.levels = queue.Queue(maxsize=max(1, depth))
+        self.stopped = threading.Event()
+        self.stalls = 0  # Times next_level() had to wait for a level to finish
+        self.thread = threading.Thread(target=self._run, name='level-pipeline', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                level = self.make_level()
+            except Exception as error:
+                # Hand the failure to the main loop instead of dying silently
+                level = error
+            while not self.stopped.is_set():
+                try:
+                    self.levels.put(level, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(level, Exception):
+                return
+
+    def next_level(self):
+        """
+        Returns the next ready level, waiting only if none has been finished yet.
+
+        Raises:
+            Exception: Whatever make_level raised on the background thread.
+        """
+        try:
+            level = self.levels.get_nowait()
+        except queue.Empty:
+            self.stalls += 1
+            level = self.levels.get()
+        if isinstance(level, Exception):
+            raise level
+        return level
+
+    def close(self):
+        """
+        Stops the background thread; levels still in the queue are discarded.
+        """
+        self.stopped.set()
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,279 @@
+# planner.py
+
+import heapq
+import time
+from collections import deque
+
+from package.grid import WALL
+
+# Map directions in clockwise order (up, right, down, left) as (dx, dy) steps; turning
+# right ('d') moves one place along this list, turning left ('a') one place back
+STEPS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+
+def get_heuristic(goals):
+    """
+    Returns an admissible distance estimate for a set of goal cells: the Manhattan
+    distance to their bounding box, which is exact for a single goal.
+    """
+    min_x = min(x for x, _ in goals)
+    max_x = max(x for x, _ in goals)
+    min_y = min(y for _, y in goals)
+    max_y = max(y for _, y in goals)
+
+    def heuristic(x, y):
+        return max(min_x - x, 0, x - max_x) + max(min_y - y, 0, y - max_y)
+
+    return heuristic
+
+
+def find_path_astar(grid, start, goals):
+    """
+    Finds a shortest path from start to the nearest goal with A* search.
+
+    Parameters:
+        grid (Grid): The maze.
+        start (tuple): (x, y) cell to start from.
+        goals (list): (x, y) cells to reach.
+
+    Returns:
+        tuple: (path, expansions), where path is the list of (x, y) cells from start to
+            a goal, or None if no goal can be reached, and expansions is the number of
+            cells taken off the open list.
+    """
+    if not goals:
+        return None, 0
+    cells = grid.cells
+    width = grid.width
+    height = grid.height
+    goal_set = set(goals)
+    heuristic = get_heuristic(goals)
+
+    costs = {start: 0}
+    parents = {start: None}
+    # Ties on f go to the deeper node, which keeps A* heading down corridors
+    open_list = [(heuristic(*start), 0, start)]
+    expansions = 0
+    while open_list:
+        _, negative_cost, node = heapq.heappop(open_list)
+        cost = -negative_cost
+        if cost > costs[node]:
+            continue  # Stale entry; the cell was reached more cheaply since
+        expansions += 1
+        if node in goal_set:
+            return get_path(parents, node), expansions
+        x, y = node
+        for dx, dy in STEPS:
+            nx = x + dx
+            ny = y + dy
+            if 0 <= nx < width and 0 <= ny < height and not cells[ny * width + nx] & WALL:
+                neighbour = (nx, ny)
+                if cost + 1 < costs.get(neighbour, cost + 2):
+                    costs[neighbour] = cost + 1
+                    parents[neighbour] = node
+                    heapq.heappush(open_list, (cost + 1 + heuristic(nx, ny), -cost - 1, neighbour))
+    return None, expansions
+
+
+def find_path_jps(grid, start, goals):
+    """
+    Finds a shortest path from start to the nearest goal with jump point search.
+
+    This is A* over jump points only, for a grid with four-way movement. Horizontal
+    jumps run until a cell gains an opening above or below that the cell behind did not
+    have; vertical jumps also stop wherever a horizontal jump from them would find
+    something. Everything in between is skipped, so long straight corridors and open
+    rooms cost one expansion instead of one per cell.
+
+    Parameters:
+        grid (Grid): The maze.
+        start (tuple): (x, y) cell to start from.
+        goals (list): (x, y) cells to reach.
+
+    Returns:
+        tuple: (path, expansions), as for find_path_astar; the path lists every cell,
+            not just the jump points.
+    """
+    if not goals:
+        return None, 0
+    cells = grid.cells
+    width = grid.width
+    height = grid.height
+    goal_set = set(goals)
+    heuristic = get_heuristic(goals)
+
+    def is_open(x, y):
+        return 0 <= x < width and 0 <= y < height and not cells[y * width + x] & WALL
+
+    def jump_horizontal(x, y, dx):
+        while True:
+            x += dx
+            if not is_open(x, y):
+                return None
+            if (x, y) in goal_set:
+                return x, y
+            if ((is_open(x, y - 1) and not is_open(x - dx, y - 1)) or
+                    (is_open(x, y + 1) and not is_open(x - dx, y + 1))):
+                return x, y
+
+    def jump_vertical(x, y, dy):
+        while True:
+            y += dy
+            if not is_open(x, y):
+                return None
+            if (x, y) in goal_set:
+                return x, y
+            if ((is_open(x - 1, y) and not is_open(x - 1, y - dy)) or
+                    (is_open(x + 1, y) and not is_open(x + 1, y - dy))):
+                return x, y
+            if jump_horizontal(x, y, 1) is not None or jump_horizontal(x, y, -1) is not None:
+                return x, y
+
+    def get_directions(node, parent):
+        # Directions worth searching from node, given the direction it was reached in
+        if parent is None:
+            return STEPS
+        x, y = node
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        if dy:
+            return [(0, dy), (1, 0), (-1, 0)]
+        directions = [(dx, 0)]
+        if is_open(x, y - 1) and not is_open(x - dx, y - 1):
+            directions.append((0, -1))
+        if is_open(x, y + 1) and not is_open(x - dx, y + 1):
+            directions.append((0, 1))
+        return directions
+
+    costs = {start: 0}
+    parents = {start: None}
+    open_list = [(heuristic(*start), 0, start)]
+    expansions = 0
+    while open_list:
+        _, negative_cost, node = heapq.heappop(open_list)
+        cost = -negative_cost
+        if cost > costs[node]:
+            continue
+        expansions += 1
+        if node in goal_set:
+            return fill_path(get_path(parents, node)), expansions
+        x, y = node
+        for dx, dy in get_directions(node, parents[node]):
+            if dx:
+                jump_point = jump_horizontal(x, y, dx)
+            else:
+                jump_point = jump_vertical(x, y, dy)
+            if jump_point is None:
+                continue
+            jump_cost = cost + abs(jump_point[0] - x) + abs(jump_point[1] - y)
+            if jump_cost < costs.get(jump_point, jump_cost + 1):
+                costs[jump_point] = jump_cost
+                parents[jump_point] = node
+                heapq.heappush(open_list, (jump_cost + heuristic(*jump_point), -jump_cost,
+                                           jump_point))
+    return None, expansions
+
+
+def get_path(parents, node):
+    # Walk the parent links back from the goal
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def fill_path(jump_points):
+    # Expand straight runs between jump points into every cell along them
+    path = jump_points[:1]
+    for x1, y1 in jump_points[1:]:
+        x, y = path[-1]
+        dx = (x1 > x) - (x1 < x)
+        dy = (y1 > y) - (y1 < y)
+        while (x, y) != (x1, y1):
+            x += dx
+            y += dy
+            path.append((x, y))
+    return path
+
+
+def get_commands(path, facing):
+    """
+    Converts a path into keypresses for a player starting at its first cell.
+
+    Parameters:
+        path (list): (x, y) cells, each next to the one before.
+        facing (int): Index in STEPS of the direction the player starts facing.
+
+    Returns:
+        list: (key, (x, y, facing)) pairs: each keypress with the state the player is
+            expected to be in just before it.
+    """
+    commands = []
+    x, y = path[0]
+    for next_x, next_y in path[1:]:
+        direction = STEPS.index((next_x - x, next_y - y))
+        turn = (direction - facing) % 4
+        if turn == 3:
+            commands.append((ord('a'), (x, y, facing)))
+        else:
+            for _ in range(turn):
+                commands.append((ord('d'), (x, y, facing)))
+                facing = (facing + 1) % 4
+        facing = direction
+        commands.append((ord('w'), (x, y, facing)))
+        x, y = next_x, next_y
+    return commands
+
+
+class PathPlanner:
+    """
+    Plans the whole way to the goal at once and replays it one keypress at a time.
+
+    The plan is kept until the player is not where it expects (another key was
+    pressed, a move was blocked) or the maze changes, and only then replanned. Plan
+    counts, node expansions and planning time are kept so planners can be compared.
+    """
+
+    def __init__(self, search, get_goals):
+        self.search = search        # find_path_astar, find_path_jps or alike
+        self.get_goals = get_goals  # Called with the grid to get the goal cells
+        self.grid = None            # Maze the current plan was made for
+        self.commands = deque()
+        self.unreachable = False    # No goal can be reached on this grid
+        self.plans = 0
+        self.expansions = 0
+        self.plan_time = 0.0
+
+    def next_move(self, grid, x, y, facing):
+        """
+        Returns the next keypress of the plan, replanning first if needed.
+
+        Parameters:
+            grid (Grid): The maze.
+            x (int): Player's X cell.
+            y (int): Player's Y cell.
+            facing (int): Index in STEPS of the direction the player faces.
+
+        Returns:
+            int or None: The keypress, or None if no goal can be reached from here.
+        """
+        if grid is self.grid:
+            if self.commands and self.commands[0][1] == (x, y, facing):
+                return self.commands.popleft()[0]
+            if self.unreachable:
+                return None
+        self.plan(grid, x, y, facing)
+        return self.commands.popleft()[0] if self.commands else None
+
+    def plan(self, grid, x, y, facing):
+        start = time.perf_counter()
+        path, expansions = self.search(grid, (x, y), self.get_goals(grid))
+        self.plan_time += time.perf_counter() - start
+        self.plans += 1
+        self.expansions += expansions
+
+        self.grid = grid
+        self.unreachable = path is None
+        self.commands = deque(get_commands(path, facing) if path else ())
@@ -0,0 +1,242 @@
+# raycast.py
+
+import math
+
+from package.grid import WALL
+from package.shading import NUM_SHADE_LEVELS, get_shade_level
+
+# NumPy is optional; without it every column is cast in pure Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Wall sides reported by cast_ray
+SIDE_NONE = -1  # Ray left the map or ran out of depth
+SIDE_X = 0      # Ray crossed a vertical grid line (east/west face)
+SIDE_Y = 1      # Ray crossed a horizontal grid line (north/south face)
+
+# Angular tolerance (radians) for flagging a block edge, matching the old corner test
+BOUNDARY_ANGLE = 0.01
+
+
+def cast_ray(mMapData, mMapWidth, mMapHeight, fPosX, fPosY, fEyeX, fEyeY, mDepth):
+    """
+    Casts a single ray through the map with a grid-exact digital differential analyzer.
+
+    The ray steps from grid line to grid line, so only the cells it actually crosses
+    are tested and the hit distance is exact rather than quantized to a fixed step.
+
+    Parameters:
+        mMapData (Grid): The maze representation.
+        mMapWidth (int): Width of the map in cells.
+        mMapHeight (int): Height of the map in cells.
+        fPosX (float): Ray origin X.
+        fPosY (float): Ray origin Y.
+        fEyeX (float): Unit ray direction X.
+        fEyeY (float): Unit ray direction Y.
+        mDepth (float): Maximum distance to trace.
+
+    Returns:
+        tuple: (fDistance, nSide, fTexX, bBoundary) where fDistance is the distance to the
+        wall (mDepth if nothing was hit), nSide is one of SIDE_X, SIDE_Y or SIDE_NONE,
+        fTexX is the hit position along the wall face in [0, 1) and bBoundary is True
+        when the hit lies on a block edge.
+    """
+    nMapX = int(fPosX)
+    nMapY = int(fPosY)
+
+    # Distance along the ray between successive vertical / horizontal grid lines
+    fDeltaX = abs(1.0 / fEyeX) if fEyeX != 0 else math.inf
+    fDeltaY = abs(1.0 / fEyeY) if fEyeY != 0 else math.inf
+
+    # Distance along the ray to the first vertical / horizontal grid line
+    if fEyeX < 0:
+        nStepX = -1
+        fSideX = (fPosX - nMapX) * fDeltaX
+    else:
+        nStepX = 1
+        fSideX = (nMapX + 1.0 - fPosX) * fDeltaX
+    if fEyeY < 0:
+        nStepY = -1
+        fSideY = (fPosY - nMapY) * fDeltaY
+    else:
+        nStepY = 1
+        fSideY = (nMapY + 1.0 - fPosY) * fDeltaY
+
+    while True:
+        # Advance to whichever grid line is closer
+        if fSideX < fSideY:
+            fDistance = fSideX
+            fSideX += fDeltaX
+            nMapX += nStepX
+            nSide = SIDE_X
+        else:
+            fDistance = fSideY
+            fSideY += fDeltaY
+            nMapY += nStepY
+            nSide = SIDE_Y
+
+        if fDistance >= mDepth:
+            return mDepth, SIDE_NONE, 0.0, False
+
+        if nMapX < 0 or nMapX >= mMapWidth or nMapY < 0 or nMapY >= mMapHeight:
+            return mDepth, SIDE_NONE, 0.0, False
+
+        if mMapData.cells[nMapY * mMapWidth + nMapX] & WALL:
+            break
+
+    # Position of the hit along the face, and how obliquely the ray meets it
+    if nSide == SIDE_X:
+        fHit = fPosY + fEyeY * fDistance
+        fObliquity = abs(fEyeX)
+    else:
+        fHit = fPosX + fEyeX * fDistance
+        fObliquity = abs(fEyeY)
+    fTexX = fHit - math.floor(fHit)
+
+    # A hit close to either end of the face sees the block edge within BOUNDARY_ANGLE
+    fEdge = min(fTexX, 1.0 - fTexX)
+    bBoundary = fEdge * fObliquity < BOUNDARY_ANGLE * fDistance
+
+    return fDistance, nSide, fTexX, bBoundary
+
+
+def get_wall_array(mMapData):
+    """
+    Returns a boolean NumPy array (rows x columns) marking the wall cells of mMapData.
+
+    Walls never change during a level, so the array is built once per grid and reused on
+    every frame.
+    """
+    cached = _wall_array_cache.get('map')
+    if cached is not mMapData:
+        cells = np.frombuffer(mMapData.cells, dtype=np.uint8)
+        _wall_array_cache['map'] = mMapData
+        _wall_array_cache['walls'] = (cells & WALL).astype(bool).reshape(mMapData.height,
+                                                                          mMapData.width)
+    return _wall_array_cache['walls']
+
+_wall_array_cache = {}
+
+
+def cast_columns(mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA, mFOV, mDepth,
+                 mRenderWidth, engine=None):
+    """
+    Casts one ray per screen column across the field of view.
+
+    Parameters:
+        mMapData (Grid): The maze representation.
+        mMapWidth (int): Width of the map in cells.
+        mMapHeight (int): Height of the map in cells.
+        mPlayerX (float): Player's X position.
+        mPlayerY (float): Player's Y position.
+        mPlayerA (float): Player's angle (radians).
+        mFOV (float): Field of view (radians).
+        mDepth (float): Maximum distance to trace.
+        mRenderWidth (int): Number of columns to cast.
+        engine (str): 'numpy', 'python' or None to pick NumPy when it is installed.
+
+    Returns:
+        tuple: (distances, boundaries, levels) lists with one entry per column.
+    """
+    if engine is None:
+        engine = 'numpy' if np is not None else 'python'
+    if engine == 'numpy':
+        return _cast_columns_numpy(mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA,
+                                   mFOV, mDepth, mRenderWidth)
+    return _cast_columns_python(mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA,
+                                mFOV, mDepth, mRenderWidth)
+
+
+def _cast_columns_python(mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA, mFOV,
+                         mDepth, mRenderWidth):
+    distances = []
+    boundaries = []
+    levels = []
+    for x in range(mRenderWidth):
+        # Calculate the ray angle (fixed to correct horizontal mirroring)
+        fRayAngle = mPlayerA + mFOV / 2.0 - (x / mRenderWidth) * mFOV
+        fDistance, nSide, fTexX, bBoundary = cast_ray(
+            mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY,
+            math.sin(fRayAngle), math.cos(fRayAngle), mDepth)
+        distances.append(fDistance)
+        boundaries.append(bBoundary)
+        levels.append(get_shade_level(fDistance, mDepth))
+    return distances, boundaries, levels
+
+
+def _first_crossing(walls, fPos, fOther, afEye, afEyeOther, mDepth):
+    """
+    Finds, for every ray, the first grid line crossing along one axis that ends the ray.
+
+    A ray crosses at most mDepth + 1 grid lines along an axis before running out of depth,
+    so all candidate crossings are laid out as a (rays x crossings) array and the earliest
+    wall or out-of-bounds crossing is picked with a single argmax.
+
+    Parameters:
+        walls (ndarray): Wall array indexed [along, other] for this axis.
+        fPos (float): Ray origin along the stepping axis.
+        fOther (float): Ray origin along the other axis.
+        afEye (ndarray): Ray direction components along the stepping axis.
+        afEyeOther (ndarray): Ray direction components along the other axis.
+
+    Returns:
+        tuple: (distance, hit) arrays; distance is inf where the ray never ends on this axis
+        and hit is True where it ends on a wall rather than leaving the map.
+    """
+    nRays = afEye.shape[0]
+    nMap = int(fPos)
+    k = np.arange(int(mDepth) + 2)[None, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fDelta = np.abs(1.0 / afEye)[:, None]
+        fFirst = np.where(afEye < 0, fPos - nMap, nMap + 1.0 - fPos)[:, None] * fDelta
+        t = fFirst + k * fDelta
+        bValid = t < mDepth
+        nCell = nMap + np.where(afEye < 0, -1, 1)[:, None] * (k + 1)
+        nOther = np.where(bValid, np.floor(fOther + afEyeOther[:, None] * t), -1).astype(np.int64)
+
+    nAlong, nAcross = walls.shape
+    bInside = bValid & (nCell >= 0) & (nCell < nAlong) & (nOther >= 0) & (nOther < nAcross)
+    bWall = np.zeros(t.shape, dtype=bool)
+    bWall[bInside] = walls[nCell[bInside], nOther[bInside]]
+
+    # The ray ends at its first wall or at the first crossing that leaves the map
+    bEnd = bWall | (bValid & ~bInside)
+    nFirst = np.argmax(bEnd, axis=1)
+    nRows = np.arange(nRays)
+    fEnd = np.where(bEnd[nRows, nFirst], t[nRows, nFirst], np.inf)
+    return fEnd, bWall[nRows, nFirst]
+
+
+def _cast_columns_numpy(mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA, mFOV,
+                        mDepth, mRenderWidth):
+    walls = get_wall_array(mMapData)
+
+    afRayAngle = mPlayerA + mFOV / 2.0 - (np.arange(mRenderWidth) / mRenderWidth) * mFOV
+    afEyeX = np.sin(afRayAngle)
+    afEyeY = np.cos(afRayAngle)
+
+    # Vertical grid lines step in X (walls indexed [x, y]); horizontal ones step in Y
+    fEndX, bHitX = _first_crossing(walls.T, mPlayerX, mPlayerY, afEyeX, afEyeY, mDepth)
+    fEndY, bHitY = _first_crossing(walls, mPlayerY, mPlayerX, afEyeY, afEyeX, mDepth)
+
+    # Like cast_ray, a tie between the two axes is resolved in favour of the Y crossing
+    bUseX = fEndX < fEndY
+    bHit = np.where(bUseX, bHitX, bHitY)
+    afDistance = np.where(bHit, np.where(bUseX, fEndX, fEndY), float(mDepth))
+    anSide = np.where(bHit, np.where(bUseX, SIDE_X, SIDE_Y), SIDE_NONE)
+
+    # Texture coordinate along the face and block-edge detection, as in cast_ray
+    bSideX = anSide == SIDE_X
+    fHit = np.where(bSideX, mPlayerY + afEyeY * afDistance, mPlayerX + afEyeX * afDistance)
+    fTexX = fHit - np.floor(fHit)
+    fObliquity = np.where(bSideX, np.abs(afEyeX), np.abs(afEyeY))
+    abBoundary = np.minimum(fTexX, 1.0 - fTexX) * fObliquity < BOUNDARY_ANGLE * afDistance
+    abBoundary &= bHit
+
+    anLevel = (afDistance / mDepth * NUM_SHADE_LEVELS).astype(np.int64)
+    anLevel = np.clip(anLevel, 0, NUM_SHADE_LEVELS - 1)
+
+    return afDistance.tolist(), abBoundary.tolist(), anLevel.tolist()
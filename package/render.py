@@ -1,194 +1,102 @@
 # render.py
 
 import math
-import curses
+import time
 
 from package.util import get_direction_text, get_direction_icon
-from package.shading import init_colors, get_wall_shade
+from package.shading import get_shade_table, BOUNDARY_SHADE
+from package.palette import MONOCHROME
+from package.grid import CELL_CHARS, WALL, EXIT, DOT, SEEN
+from package.raycast import cast_columns
+
+# Walkers of a swarm on the minimap
+WALKER_CHAR = 'o'
+
+# Walker sprite characters in the 3D view, from nearest to furthest
+SPRITE_CHARS = '@@OOoo..'
 
 def render_scene(mRenderWidth, mRenderHeight, mScreenWidth, mScreenHeight, mMapWidth, mMapHeight,
-                 mPlayerX, mPlayerY, mPlayerA, mFOV, mDepth, mElapsedTime, mMapData, mPlayerLevel,mShowFPS,mFogData, stdscr):
-    # Initialize colors
-    use_256_colors = init_colors()
-
-    # Define color pair indices (ensure these are initialized in init_colors)
-    WALL_MAP_COLOR_PAIR = 4    # Walls on the map in green
-    FLOOR_MAP_COLOR_PAIR = 5   # Floor on the map in black/default
-    PLAYER_COLOR_PAIR = 8      # Bright yellow for the player icon
-    EXIT_COLOR_PAIR = 9        # Bright blue for the exit
-    DOT_COLOR_PAIR = 12        # White color for dots
-
-    # Render the scene
-    for x in range(mRenderWidth):
-        # Calculate the ray angle (fixed to correct horizontal mirroring)
-        fRayAngle = mPlayerA + mFOV / 2.0 - (x / mRenderWidth) * mFOV
-
-        # Initial ray position and direction
-        fDistanceToWall = 0.0
-        bHitWall = False
-        bBoundary = False
-
-        fEyeX = math.sin(fRayAngle)
-        fEyeY = math.cos(fRayAngle)
-
-        # Variables to store the exact hit point
-        fHitX = 0.0
-        fHitY = 0.0
-
-        # Incrementally cast ray from player
-        while not bHitWall and fDistanceToWall < mDepth:
-            fDistanceToWall += 0.1
-            fTestX = mPlayerX + fEyeX * fDistanceToWall
-            fTestY = mPlayerY + fEyeY * fDistanceToWall
-            nTestX = int(fTestX)
-            nTestY = int(fTestY)
-
-            # Test if ray is out of bounds
-            if nTestX < 0 or nTestX >= mMapWidth or nTestY < 0 or nTestY >= mMapHeight:
-                bHitWall = True
-                fDistanceToWall = mDepth
-            else:
-                # Ray is inbounds so test to see if the ray cell is a wall block
-                if mMapData[nTestY][nTestX] == '#':
-                    # Wall hit
-                    bHitWall = True
-
-                    # Store exact hit coordinates
-                    fHitX = fTestX
-                    fHitY = fTestY
-
-                    # Boundary detection
-                    # Check for boundaries (edges) between blocks
-                    # We will sample points around the hit point and see if they are different
-
-                    # List of distance and dot product pairs
-                    p = []
-
-                    for tx in range(2):
-                        for ty in range(2):
-                            # Compute vector from ray origin to corner
-                            vy = nTestY + ty - mPlayerY
-                            vx = nTestX + tx - mPlayerX
-                            d = math.hypot(vx, vy)
-                            if d != 0:
-                                dot = (fEyeX * vx / d) + (fEyeY * vy / d)
-                                p.append((d, dot))
-
-                    # Sort pairs based on distance
-                    p.sort(key=lambda x: x[0])
-
-                    # Check if closest 2-3 hits are close to 90 degrees
-                    fBound = 0.01
-                    if len(p) >= 3:
-                        if math.acos(p[0][1]) < fBound:
-                            bBoundary = True
-                        if math.acos(p[1][1]) < fBound:
-                            bBoundary = True
-                        if math.acos(p[2][1]) < fBound:
-                            bBoundary = True
+                 mPlayerX, mPlayerY, mPlayerA, mFOV, mDepth, mElapsedTime, mMapData, mPlayerLevel,mShowFPS, framebuffer,
+                 mEngine=None, mViewCache=None, mMapGeneration=0, mPalette=None,
+                 mTimings=None, mMinimapWidth=None, mMinimapHeight=None, mSwarm=None,
+                 mSprites=False):
+    # Colours are set up once at startup; without a palette render in monochrome
+    if mPalette is None:
+        mPalette = MONOCHROME
+
+    # Start the frame from a blank back buffer
+    framebuffer.clear()
+
+    # Reuse the 3D view if this cell and heading have already been rendered; not with
+    # walker sprites, which need each frame's ray distances
+    view_key = None
+    view_block = None
+    if mViewCache is not None and not (mSwarm is not None and mSprites):
+        view_key = mViewCache.make_key(mPlayerX, mPlayerY, mPlayerA, mMapGeneration,
+                                       mRenderWidth, mScreenHeight)
+        if view_key is not None:
+            view_block = mViewCache.get(view_key)
+
+    if view_block is not None:
+        framebuffer.put_block(0, view_block)
+    else:
+        afDistance = render_view(mRenderWidth, mScreenHeight, mMapWidth, mMapHeight, mPlayerX,
+                                 mPlayerY, mPlayerA, mFOV, mDepth, mMapData, mPalette,
+                                 framebuffer, mEngine, mTimings)
+        if view_key is not None:
+            mViewCache.put(view_key, framebuffer.get_block(0, mRenderWidth))
 
-        if fDistanceToWall == 0:
-            fDistanceToWall = 0.0001  # Prevent division by zero
+        # Sprites move every tick, so they are drawn over the view and never cached
+        if mSwarm is not None and mSprites:
+            render_sprites(mRenderWidth, mScreenHeight, mPlayerX, mPlayerY, mPlayerA, mFOV,
+                           mDepth, afDistance, mSwarm, mPalette, framebuffer)
 
-        nCeiling = int(mScreenHeight / 2 - mScreenHeight / fDistanceToWall)
-        nFloor = mScreenHeight - nCeiling
-
-        # Get wall shade and color using the function from shading.py
-        nShade_base, color_pair = get_wall_shade(fDistanceToWall, bBoundary, mDepth, use_256_colors)
-
-        # Create vertical repetition by alternating characters based on y-coordinate
-        for y in range(mScreenHeight):
-            if y < nCeiling:
-                # Sky
-                ch = ' '
-                try:
-                    stdscr.addch(y, x, ch)
-                except curses.error:
-                    pass
-            elif y >= nCeiling and y < nFloor:
-                # Wall with vertical patterning
-                # Alternate characters every few lines to create vertical repetition
-                pattern_index = (y - nCeiling) % 4
-                if pattern_index == 0:
-                    nShade = nShade_base
-                elif pattern_index == 1:
-                    nShade = '|'
-                elif pattern_index == 2:
-                    nShade = nShade_base
-                else:
-                    nShade = '|'
-                try:
-                    stdscr.addch(y, x, nShade, color_pair)
-                except curses.error:
-                    pass
-            elif y == nFloor:
-                # Floor boundary (outline)
-                try:
-                    stdscr.addch(y, x, '_', curses.color_pair(6))
-                except curses.error:
-                    pass
-            else:
-                # Floor
-                floor_char = '.'
-                floor_color = curses.color_pair(8)
-                try:
-                    stdscr.addch(y, x, floor_char, floor_color)
-                except curses.error:
-                    pass
+    if mTimings is not None:
+        fMapStart = time.perf_counter()
 
     # Draw separator between the rendering area and the map
     separator_x = mRenderWidth
     for y in range(mScreenHeight):
-        try:
-            stdscr.addch(y, separator_x, '|', curses.color_pair(7))
-        except curses.error:
-            pass
-
-    # Display the map on the right side
+        framebuffer.put(y, separator_x, '|', mPalette.separator)
+
+    # Large maps are shown through a window centred on the player and clamped to the map
+    if mMinimapWidth is None:
+        mMinimapWidth = mMapWidth
+    if mMinimapHeight is None:
+        mMinimapHeight = mMapHeight
+    view_x = max(0, min(int(mPlayerX) - mMinimapWidth // 2, mMapWidth - mMinimapWidth))
+    view_y = max(0, min(int(mPlayerY) - mMinimapHeight // 2, mMapHeight - mMinimapHeight))
+
+    # Display the map on the right side, translating each row of cells through the lookup
+    map_chars, map_attrs = get_minimap_lookup(mPalette)
     map_offset_x = mRenderWidth + 1  # +1 for separator
-    for ny in range(mMapHeight):
-        for nx in range(mMapWidth):
-            ch = mMapData[ny][nx]
-            fo = mFogData[ny][nx]
-            screen_x = nx + map_offset_x
-            screen_y = ny
-            if 0 <= screen_x < mScreenWidth and 0 <= screen_y < mScreenHeight:
-                if fo == False:
-                    color = curses.color_pair(7)
-                    ch = ' '
-                elif ch == '#':
-                    color = curses.color_pair(WALL_MAP_COLOR_PAIR)
-                elif ch == 'X':
-                    color = curses.color_pair(EXIT_COLOR_PAIR)
-                elif ch == '.':
-                    color = curses.color_pair(DOT_COLOR_PAIR)
-                else:
-                    color = curses.color_pair(FLOOR_MAP_COLOR_PAIR)
-                try:
-                    stdscr.addch(screen_y, screen_x, ch, color)
-                except curses.error:
-                    pass
-
-    # Display the player on the map and remove the dot if present
+    for screen_y in range(min(mMinimapHeight, mScreenHeight)):
+        row = mMapData.row(view_y + screen_y)[view_x:view_x + mMinimapWidth]
+        framebuffer.put_row(screen_y, map_offset_x, [map_chars[value] for value in row],
+                            [map_attrs[value] for value in row])
+
+    # Display the walkers standing on explored cells in the map window
+    if mSwarm is not None:
+        window_height = min(mMinimapHeight, mScreenHeight)
+        for _, walker_x, walker_y in mSwarm.index.items_within(
+                view_x, view_y, view_x + mMinimapWidth, view_y + window_height):
+            if mMapData.has(walker_x, walker_y, SEEN):
+                framebuffer.put(walker_y - view_y, walker_x - view_x + map_offset_x, WALKER_CHAR,
+                                mPalette.walker)
+
+    # Display the player on the map
     player_map_x = int(mPlayerX)
     player_map_y = int(mPlayerY)
-    map_screen_x = player_map_x + map_offset_x
-    map_screen_y = player_map_y
-
-    # Remove the dot from the map data if the player is on a dot
-    if mMapData[player_map_y][player_map_x] == '.':
-        mMapData[player_map_y][player_map_x] = ' '  # Corrected line
+    map_screen_x = player_map_x - view_x + map_offset_x
+    map_screen_y = player_map_y - view_y
 
     # Display the player icon
     if 0 <= map_screen_x < mScreenWidth and 0 <= map_screen_y < mScreenHeight:
-        try:
-            stdscr.addch(map_screen_y, map_screen_x, get_direction_icon(mPlayerA),
-                         curses.color_pair(PLAYER_COLOR_PAIR))
-        except curses.error:
-            pass
+        framebuffer.put(map_screen_y, map_screen_x, get_direction_icon(mPlayerA),
+                        mPalette.player)
 
     # Display stats under the map
-    stats_start_y = mMapHeight + 1  # Start below the map
+    stats_start_y = mMinimapHeight + 1  # Start below the map
     fps = 1.0 / mElapsedTime if mElapsedTime != 0 else 0.0  # Prevent division by zero
 
     dir_text = get_direction_text(mPlayerA)
@@ -209,8 +117,119 @@ def render_scene(mRenderWidth, mRenderHeight, mScreenWidth, mScreenHeight, mMapW
         screen_y = stats_start_y + i
         screen_x = mRenderWidth + 1
         if screen_y < mScreenHeight:
-            try:
-                stdscr.addstr(screen_y, screen_x, stat)
-            except curses.error:
-                pass
+            framebuffer.put_str(screen_y, screen_x, stat)
+
+    if mTimings is not None:
+        mTimings['minimap'] = mTimings.get('minimap', 0.0) + time.perf_counter() - fMapStart
+
+
+def get_minimap_lookup(palette):
+    """
+    Returns (chars, attrs) lists giving the minimap character and attribute of every
+    possible cell value, built once per palette.
+    """
+    lookup = _minimap_lookups.get(palette)
+    if lookup is None:
+        chars = []
+        attrs = []
+        for value in range(256):
+            if not value & SEEN:
+                chars.append(' ')
+                attrs.append(palette.fog)
+                continue
+            chars.append(CELL_CHARS[value])
+            if value & WALL:
+                attrs.append(palette.map_wall)
+            elif value & EXIT:
+                attrs.append(palette.map_exit)
+            elif value & DOT:
+                attrs.append(palette.map_dot)
+            else:
+                attrs.append(palette.map_floor)
+        lookup = (chars, attrs)
+        _minimap_lookups[palette] = lookup
+    return lookup
 
+_minimap_lookups = {}
+
+
+def render_view(mRenderWidth, mScreenHeight, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA,
+                mFOV, mDepth, mMapData, palette, framebuffer, mEngine=None, mTimings=None):
+    if mTimings is not None:
+        fStart = time.perf_counter()
+
+    # Cast every column's ray in one batch (vectorized when NumPy is available)
+    afDistance, abBoundary, anLevel = cast_columns(
+        mMapData, mMapWidth, mMapHeight, mPlayerX, mPlayerY, mPlayerA, mFOV, mDepth,
+        mRenderWidth, mEngine)
+
+    if mTimings is not None:
+        fCast = time.perf_counter()
+        mTimings['raycast'] = mTimings.get('raycast', 0.0) + fCast - fStart
+
+    # Prebuilt columns for every (wall height, shade) of this depth and palette
+    shade_table = get_shade_table(mDepth, palette)
+
+    # Pick the prebuilt column for every screen column
+    column_chars = []
+    column_attrs = []
+    for x in range(mRenderWidth):
+        fDistanceToWall = afDistance[x]
+
+        if fDistanceToWall == 0:
+            fDistanceToWall = 0.0001  # Prevent division by zero
+
+        nCeiling = int(mScreenHeight / 2 - mScreenHeight / fDistanceToWall)
+        nShadeIndex = BOUNDARY_SHADE if abBoundary[x] else anLevel[x]
+
+        chars, attrs = shade_table.column(nCeiling, nShadeIndex, mScreenHeight)
+        column_chars.append(chars)
+        column_attrs.append(attrs)
+
+    # Transpose into screen rows and emit the view row-major, one row at a time
+    if column_chars:
+        for y, (row_chars, row_attrs) in enumerate(zip(zip(*column_chars), zip(*column_attrs))):
+            framebuffer.put_row(y, 0, row_chars, row_attrs)
+
+    if mTimings is not None:
+        mTimings['shading'] = mTimings.get('shading', 0.0) + time.perf_counter() - fCast
+
+    return afDistance
+
+
+def render_sprites(mRenderWidth, mScreenHeight, mPlayerX, mPlayerY, mPlayerA, mFOV, mDepth,
+                   afDistance, swarm, palette, framebuffer):
+    """
+    Draws the swarm's walkers in front of the player into the 3D view.
+
+    Only walkers within mDepth are looked up, through the swarm's spatial index. Each is
+    projected onto the screen columns like a ray hit and drawn furthest first, in the
+    columns where it is nearer than the wall that column's ray hit (afDistance).
+    """
+    nDepth = int(mDepth)
+    sprites = []
+    for _, walker_x, walker_y in swarm.index.items_near(int(mPlayerX), int(mPlayerY), nDepth):
+        fDX = walker_x + 0.5 - mPlayerX
+        fDY = walker_y + 0.5 - mPlayerY
+        fDistance = math.hypot(fDX, fDY)
+        if fDistance < 0.5 or fDistance >= mDepth:
+            continue
+        # Angle from the view direction, positive towards the left of the screen
+        fAngle = (math.atan2(fDX, fDY) - mPlayerA + math.pi) % (2 * math.pi) - math.pi
+        if abs(fAngle) > mFOV / 2:
+            continue
+        sprites.append((fDistance, fAngle))
+    sprites.sort(reverse=True)
+
+    for fDistance, fAngle in sprites:
+        # A walker is half a cell wide and stands on the floor, three quarters of a wall high
+        nCentre = int((mFOV / 2 - fAngle) / mFOV * mRenderWidth)
+        nHalfWidth = int(mRenderWidth / mFOV * 0.25 / fDistance)
+        nFloor = min(mScreenHeight, int(mScreenHeight / 2 + mScreenHeight / fDistance))
+        nTop = max(0, int(mScreenHeight / 2 - mScreenHeight / (2 * fDistance)))
+        char = SPRITE_CHARS[min(len(SPRITE_CHARS) - 1,
+                                int(fDistance / mDepth * len(SPRITE_CHARS)))]
+        for x in range(max(0, nCentre - nHalfWidth), min(mRenderWidth, nCentre + nHalfWidth + 1)):
+            if fDistance < afDistance[x]:
+                for y in range(nTop, nFloor):
+                    framebuffer.put(y, x, char, palette.walker)
@@ -0,0 +1,97 @@
+# scheduler.py
+
+import math
+import time
+
+
+class FrameScheduler:
+    """
+    Paces the main loop with fixed-rate simulation ticks and deadline-based frames.
+
+    Simulation ticks (AI and movement) advance on their own fixed timestep, independent
+    of how often frames are drawn. Frames are due on a regular deadline; wait() sleeps
+    only for the time left until the next one, so the frame rate does not drift with the
+    amount of work done per frame.
+
+    A frame runs the ticks of a whole frame interval, however far apart the two rates
+    are; with a fake clock driven in the order the main loop calls it:
+
+    >>> clock = [0.0]
+    >>> def sleep(seconds):
+    ...     clock[0] += seconds
+    >>> def ticks_per_second(fps, tick_rate):
+    ...     scheduler = FrameScheduler(fps, tick_rate, clock=lambda: clock[0], sleep=sleep)
+    ...     start = clock[0]
+    ...     ticks = 0
+    ...     for _ in range(20 * fps):
+    ...         ticks += scheduler.ticks_due()
+    ...         scheduler.should_render(True)
+    ...         scheduler.wait()
+    ...     ticks += scheduler.ticks_due()
+    ...     return round(ticks / (clock[0] - start))
+    >>> ticks_per_second(1, 10), ticks_per_second(10, 100), ticks_per_second(30, 10)
+    (10, 100, 10)
+    """
+
+    def __init__(self, fps=10.0, tick_rate=10.0, max_catchup_ticks=5, max_skipped_frames=5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.frame_interval = 1.0 / fps
+        self.tick_interval = 1.0 / tick_rate
+        # One frame interval's worth of ticks, plus a few to catch up after a slow frame
+        self.max_ticks_per_frame = math.ceil(tick_rate / fps) + max_catchup_ticks
+        self.max_skipped_frames = max_skipped_frames
+        self.clock = clock
+        self.sleep = sleep
+
+        now = clock()
+        self.next_frame = now + self.frame_interval
+        self.next_tick = now
+        self.skipped_frames = 0
+
+    def ticks_due(self):
+        """
+        Returns how many simulation ticks should run now.
+
+        When the loop has fallen far behind, the backlog is dropped rather than replayed
+        so the simulation never spirals trying to catch up.
+        """
+        now = self.clock()
+        ticks = 0
+        while self.next_tick <= now and ticks < self.max_ticks_per_frame:
+            self.next_tick += self.tick_interval
+            ticks += 1
+        if self.next_tick <= now:
+            self.next_tick = now + self.tick_interval
+        return ticks
+
+    def should_render(self, changed):
+        """
+        Decides whether to draw this frame.
+
+        Parameters:
+            changed (bool): Whether anything visible changed since the last drawn frame.
+
+        Returns:
+            bool: False if nothing changed, or if the loop is running late and fewer than
+            max_skipped_frames frames have been skipped in a row.
+        """
+        if not changed:
+            return False
+        late = self.clock() > self.next_frame
+        if late and self.skipped_frames < self.max_skipped_frames:
+            self.skipped_frames += 1
+            return False
+        self.skipped_frames = 0
+        return True
+
+    def wait(self):
+        """
+        Sleeps until the next frame deadline and schedules the one after it.
+        """
+        now = self.clock()
+        if now < self.next_frame:
+            self.sleep(self.next_frame - now)
+            self.next_frame += self.frame_interval
+        else:
+            # Running late: start the next frame interval from now instead of bursting
+            self.next_frame = now + self.frame_interval
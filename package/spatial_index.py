@@ -0,0 +1,100 @@
+# spatial_index.py
+
+# Side of the square of cells each bucket covers
+BUCKET_SIZE = 8
+
+
+class SpatialIndex:
+    """
+    Items on a grid, bucketed by the BUCKET_SIZE square of cells they stand in.
+
+    Moving an item only touches one bucket, and a query for everything in a rectangle
+    only visits the buckets that overlap it, so the cost follows how many items are
+    near, not how many there are in all. Any number of items can share a cell; a count
+    of items per occupied cell answers whether a cell is taken with one lookup.
+    """
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets = {}  # (bucket x, bucket y) -> {item: (x, y)}
+        self.counts = {}   # (x, y) -> number of items on that cell, if any
+
+    def _bucket(self, x, y):
+        return x // self.bucket_size, y // self.bucket_size
+
+    def _occupy(self, x, y):
+        counts = self.counts
+        counts[x, y] = counts.get((x, y), 0) + 1
+
+    def _vacate(self, x, y):
+        counts = self.counts
+        count = counts[x, y]
+        if count == 1:
+            del counts[x, y]
+        else:
+            counts[x, y] = count - 1
+
+    def add(self, item, x, y):
+        self.buckets.setdefault(self._bucket(x, y), {})[item] = (x, y)
+        self._occupy(x, y)
+
+    def remove(self, item, x, y):
+        key = self._bucket(x, y)
+        bucket = self.buckets[key]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[key]
+        self._vacate(x, y)
+
+    def move(self, item, x0, y0, x1, y1):
+        """
+        Moves an item from (x0, y0) to (x1, y1).
+        """
+        key = self._bucket(x0, y0)
+        if key == self._bucket(x1, y1):
+            self.buckets[key][item] = (x1, y1)
+            self._vacate(x0, y0)
+            self._occupy(x1, y1)
+        else:
+            self.remove(item, x0, y0)
+            self.add(item, x1, y1)
+
+    def clear(self):
+        self.buckets.clear()
+        self.counts.clear()
+
+    def is_occupied(self, x, y):
+        """
+        Returns True if any item stands on (x, y).
+        """
+        return (x, y) in self.counts
+
+    def items_within(self, x0, y0, x1, y1):
+        """
+        Returns the items in the rectangle of cells x0 <= x < x1, y0 <= y < y1.
+
+        Returns:
+            list: (item, x, y) for each item in the rectangle.
+        """
+        found = []
+        if x0 >= x1 or y0 >= y1:
+            return found
+        bucket_x0, bucket_y0 = self._bucket(x0, y0)
+        bucket_x1, bucket_y1 = self._bucket(x1 - 1, y1 - 1)
+        buckets = self.buckets
+        for bucket_y in range(bucket_y0, bucket_y1 + 1):
+            for bucket_x in range(bucket_x0, bucket_x1 + 1):
+                bucket = buckets.get((bucket_x, bucket_y))
+                if bucket is None:
+                    continue
+                for item, (x, y) in bucket.items():
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        found.append((item, x, y))
+        return found
+
+    def items_near(self, x, y, radius):
+        """
+        Returns the items at most radius cells from (x, y) along each axis, as
+        (item, x, y) like items_within.
+        """
+        return self.items_within(x - radius, y - radius, x + radius + 1, y + radius + 1)
@@ -0,0 +1,139 @@
+# swarm.py
+
+import random
+
+from package.grid import WALL
+from package.planner import STEPS
+from package.spatial_index import SpatialIndex
+from package.algorithms import Agent, get_goal_cells, TURN_LEFT, TURN_RIGHT, MOVE_FORWARD
+
+# A walker held back by another keeps trying the same step, and after this many ticks
+# squeezes past, so two walkers meeting head-on in a corridor do not wait forever
+PATIENCE = 8
+
+
+class Swarm:
+    """
+    Any number of autoplay walkers roaming one maze alongside the player.
+
+    Each walker is an Agent with its own solver state; positions, headings and wait
+    counts are kept in flat lists indexed by walker, and a SpatialIndex buckets the
+    walkers by position for occupancy, collision and drawing queries. step() moves
+    every walker once, so a tick costs time linear in the number of walkers. A walker
+    that reaches a goal cell starts again from a random open cell.
+    """
+
+    def __init__(self, mMapData, count, solver, seed=None):
+        self.count = count
+        self.solver = solver
+        self.rng = random.Random(seed)
+        self.index = SpatialIndex()
+        self.ticks = 0
+        self.moves = 0      # Steps taken by all walkers
+        self.blocked = 0    # Steps held back by another walker in the way
+        self.respawns = 0   # Walkers that reached a goal and started again
+        self.reset(mMapData)
+
+    def reset(self, mMapData):
+        """
+        Scatters new walkers over a new maze.
+
+        Parameters:
+            mMapData (Grid): The maze to roam.
+        """
+        self._set_maze(mMapData)
+        self.index.clear()
+        self.agents = [Agent(self.solver) for _ in range(self.count)]
+        self.xs = [0] * self.count
+        self.ys = [0] * self.count
+        self.facings = [0] * self.count
+        self.waits = [0] * self.count
+        for walker in range(self.count):
+            self._spawn(walker)
+
+    def scroll(self, mMapData, shift):
+        """
+        Follows the endless maze scrolling up by shift rows into the new window
+        mMapData. Walkers that scrolled off the top start again elsewhere.
+        """
+        self._set_maze(mMapData)
+        self.index.clear()
+        for walker in range(self.count):
+            self.ys[walker] -= shift
+            x, y = self.xs[walker], self.ys[walker]
+            if y < 0 or mMapData.cells[y * mMapData.width + x] & WALL:
+                self._spawn(walker)
+            else:
+                self.index.add(walker, x, y)
+
+    def _set_maze(self, mMapData):
+        self.mMapData = mMapData
+        self.goals = set(get_goal_cells(mMapData))
+
+    def _spawn(self, walker):
+        # Place a walker with a fresh agent on a random open cell that is not a goal
+        grid = self.mMapData
+        while True:
+            x = self.rng.randrange(grid.width)
+            y = self.rng.randrange(grid.height)
+            if not grid.cells[y * grid.width + x] & WALL and (x, y) not in self.goals:
+                break
+        self.agents[walker] = Agent(self.solver)
+        self.xs[walker] = x
+        self.ys[walker] = y
+        self.facings[walker] = self.rng.randrange(4)
+        self.waits[walker] = 0
+        self.index.add(walker, x, y)
+
+    def step(self):
+        """
+        Moves every walker by one keypress of its agent.
+        """
+        grid = self.mMapData
+        cells = grid.cells
+        width = grid.width
+        height = grid.height
+        index = self.index
+        goals = self.goals
+        agents = self.agents
+        xs = self.xs
+        ys = self.ys
+        facings = self.facings
+        waits = self.waits
+
+        self.ticks += 1
+        for walker in range(self.count):
+            x = xs[walker]
+            y = ys[walker]
+            facing = facings[walker]
+            if waits[walker]:
+                # Still waiting to take the step the agent asked for; its plan holds
+                key = MOVE_FORWARD
+            else:
+                agent = agents[walker]
+                key = agent.solve(agent, grid, x, y, facing)
+            if key == TURN_LEFT:
+                facings[walker] = (facing - 1) % 4
+            elif key == TURN_RIGHT:
+                facings[walker] = (facing + 1) % 4
+            elif key == MOVE_FORWARD:
+                dx, dy = STEPS[facing]
+                next_x = x + dx
+                next_y = y + dy
+                if (not (0 <= next_x < width and 0 <= next_y < height) or
+                        cells[next_y * width + next_x] & WALL):
+                    continue
+                if index.is_occupied(next_x, next_y) and waits[walker] < PATIENCE:
+                    waits[walker] += 1
+                    self.blocked += 1
+                    continue
+                waits[walker] = 0
+                self.moves += 1
+                if (next_x, next_y) in goals:
+                    index.remove(walker, x, y)
+                    self.respawns += 1
+                    self._spawn(walker)
+                else:
+                    index.move(walker, x, y, next_x, next_y)
+                    xs[walker] = next_x
+                    ys[walker] = next_y
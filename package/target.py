@@ -0,0 +1,61 @@
+# target.py
+
+import curses
+
+
+class CursesTarget:
+    """
+    Render target that writes frames to a curses window.
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+
+    def get_size(self):
+        # Returns (height, width) like getmaxyx
+        return self.stdscr.getmaxyx()
+
+    def write(self, y, x, text, attr=0):
+        try:
+            self.stdscr.addstr(y, x, text, attr)
+        except curses.error:
+            pass  # Writing the bottom-right cell moves the cursor off screen
+
+    def present(self):
+        self.stdscr.refresh()
+
+
+class MemoryTarget:
+    """
+    Render target that keeps frames in an in-memory character/attribute grid.
+
+    Needs no terminal, so frames can be rendered, measured and snapshotted headlessly.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.chars = [[' '] * width for _ in range(height)]
+        self.attrs = [[0] * width for _ in range(height)]
+        self.writes = 0
+        self.frames = 0
+
+    def get_size(self):
+        return self.height, self.width
+
+    def write(self, y, x, text, attr=0):
+        if not 0 <= y < self.height or x >= self.width:
+            return
+        text = text[:self.width - x]
+        self.chars[y][x:x + len(text)] = text
+        self.attrs[y][x:x + len(text)] = [attr] * len(text)
+        self.writes += 1
+
+    def present(self):
+        self.frames += 1
+
+    def snapshot(self):
+        """
+        Returns the current screen as a list of row strings.
+        """
+        return [''.join(row) for row in self.chars]
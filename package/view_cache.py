@@ -0,0 +1,71 @@
+# view_cache.py
+
+import math
+import sys
+from collections import OrderedDict
+
+# Memory the cached views may take up in all, in bytes
+MAX_BYTES = 8 * 1024 * 1024
+
+
+def get_block_size(block):
+    # Bytes held by a (chars, attrs) block of row strings and attribute arrays
+    chars, attrs = block
+    return sum(sys.getsizeof(row) for row in chars) + sum(sys.getsizeof(row) for row in attrs)
+
+
+class ViewCache:
+    """
+    LRU cache of rendered 3D-view blocks, bounded by the memory they take up.
+
+    The player only ever stands at cell centres facing one of four headings, so a maze
+    has at most 4 x (walkable cells) distinct views. Blocks are keyed by
+    (cell, heading, map generation, render size) and reused instead of ray casting.
+    Each block keeps one string and one attribute array per row, as taken by
+    FrameBuffer.get_block.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (block, size in bytes)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, mPlayerX, mPlayerY, mPlayerA, nMapGeneration, mRenderWidth, mRenderHeight):
+        """
+        Builds the cache key for a view, or returns None if the view is not cacheable
+        because the player is facing between the four grid headings.
+        """
+        fQuarter = mPlayerA / (math.pi / 2)
+        nHeading = round(fQuarter)
+        if not math.isclose(fQuarter, nHeading, abs_tol=1e-6):
+            return None
+        return (int(mPlayerX), int(mPlayerY), nHeading % 4, nMapGeneration,
+                mRenderWidth, mRenderHeight)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, block):
+        size = get_block_size(block)
+        if size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self.entries[key] = (block, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
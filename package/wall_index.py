@@ -0,0 +1,123 @@
+# wall_index.py
+
+import re
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+
+from package.grid import EXIT, WALL_MASK
+
+# A run of wall cells in a row or column of the wall mask
+_WALL_RUN = re.compile(b'\x01+')
+
+# Wall indexes of the mazes in play, built once per maze and dropped along with it
+_wall_indexes = weakref.WeakKeyDictionary()
+
+
+def get_runs(line):
+    # (starts, ends) arrays of the wall runs in a row or column of the wall mask; each
+    # run covers start <= i < end
+    starts = array('i')
+    ends = array('i')
+    for match in _WALL_RUN.finditer(line):
+        starts.append(match.start())
+        ends.append(match.end())
+    return starts, ends
+
+
+def get_wall_index(grid):
+    """
+    Returns the WallIndex of grid, building it on first use. Walls never change during
+    a level (the endless maze scrolls into a new Grid), so it is built once per maze.
+    """
+    index = _wall_indexes.get(grid)
+    if index is None:
+        index = WallIndex(grid)
+        _wall_indexes[grid] = index
+    return index
+
+
+class WallIndex:
+    """
+    The walls of a maze as sorted runs per row and per column, plus its exits.
+
+    Looking along a row or column, the next wall or the next exit is a binary search
+    over that line's runs instead of a walk from cell to cell, so line-of-sight checks
+    cost O(log n) however long the corridor is.
+    """
+
+    def __init__(self, grid):
+        self.width = width = grid.width
+        self.height = height = grid.height
+        walls = grid.translated(WALL_MASK)
+        self.rows = [get_runs(walls[y * width:(y + 1) * width]) for y in range(height)]
+        self.columns = [get_runs(walls[x::width]) for x in range(width)]
+
+        # Exit coordinates, and per row and column the sorted positions of its exits
+        self.exits = grid.find_flag(EXIT)
+        self.row_exits = {}
+        self.column_exits = {}
+        for x, y in self.exits:
+            self.row_exits.setdefault(y, []).append(x)
+            self.column_exits.setdefault(x, []).append(y)
+        for line in self.column_exits.values():
+            line.sort()
+
+    def next_wall(self, x, y, dx, dy):
+        """
+        Returns the first wall past (x, y) heading one way along its row or column.
+
+        Parameters:
+            x (int): X cell to look from.
+            y (int): Y cell to look from.
+            dx (int): -1 or 1 to look along the row, else 0.
+            dy (int): -1 or 1 to look along the column, else 0.
+
+        Returns:
+            int: X (along a row) or Y (along a column) of the wall, or the first
+                position off the map (-1, width or height) if there is none.
+        """
+        if dx:
+            starts, ends = self.rows[y]
+            position, edge, step = x, self.width, dx
+        else:
+            starts, ends = self.columns[x]
+            position, edge, step = y, self.height, dy
+        if step > 0:
+            run = bisect_right(ends, position + 1)
+            return max(starts[run], position + 1) if run < len(starts) else edge
+        run = bisect_right(starts, position - 1) - 1
+        return min(ends[run] - 1, position - 1) if run >= 0 else -1
+
+    def exit_in_sight(self, x, y):
+        """
+        Finds an exit visible straight along the row or column of (x, y).
+
+        Of several visible exits, the first in row-major order is picked, as scanning
+        the exit list would.
+
+        Returns:
+            tuple or None: (exit_x, exit_y) of the visible exit, or None.
+        """
+        visible = []
+        line = self.column_exits.get(x)
+        if line:
+            # Above: exits after the wall; below (or here): exits from y to the wall
+            i = bisect_right(line, self.next_wall(x, y, 0, -1))
+            if i < len(line) and line[i] < y:
+                visible.append((line[i], x))
+            i = bisect_left(line, y)
+            if i < len(line) and line[i] < self.next_wall(x, y, 0, 1):
+                visible.append((line[i], x))
+        line = self.row_exits.get(y)
+        if line:
+            i = bisect_right(line, self.next_wall(x, y, -1, 0))
+            if i < len(line) and line[i] < x:
+                visible.append((y, line[i]))
+            i = bisect_right(line, x)
+            if i < len(line) and line[i] < self.next_wall(x, y, 1, 0):
+                visible.append((y, line[i]))
+        if not visible:
+            return None
+        exit_y, exit_x = min(visible)
+        return exit_x, exit_y